@@ -11,6 +11,16 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Explicit connection pool sizing. Size so that
+    # pool_size * worker_count stays within the database's connection
+    # limit; pre-ping drops connections the server closed while idle.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
     VIDEO_UPLOAD_DIR = os.environ.get(
         "VIDEO_UPLOAD_DIR", str(BASE_DIR / "video_storage")
     )
@@ -23,4 +33,32 @@ class Config:
     # Max size 15 GB (fixed syntax)
     MAX_CONTENT_LENGTH = 15 * 1024 * 1024 * 1024
 
-    REGISTRATION_ENABLED_DEFAULT = True
\ No newline at end of file
+    REGISTRATION_ENABLED_DEFAULT = True
+
+    # Offload raw video streaming to the front proxy. With USE_X_ACCEL=1
+    # the stream endpoint answers with an X-Accel-Redirect header and
+    # nginx serves the bytes; pair with
+    #   location /internal/videos/ { internal; alias <VIDEO_UPLOAD_DIR>/; }
+    USE_X_ACCEL = os.environ.get("USE_X_ACCEL") == "1"
+    X_ACCEL_INTERNAL_PREFIX = os.environ.get(
+        "X_ACCEL_INTERNAL_PREFIX", "/internal/videos"
+    )
+
+    # Torrent jobs running at once; extra magnets queue in the pool.
+    MAX_CONCURRENT_TORRENTS = int(os.environ.get("MAX_CONCURRENT_TORRENTS", "4"))
+
+    # Hard cap on simultaneous live transcodes; viewers beyond it get
+    # the original file instead of queueing behind busy encoders.
+    MAX_CONCURRENT_TRANSCODES = int(os.environ.get("MAX_CONCURRENT_TRANSCODES", "4"))
+
+    # Pre-encode the 1080/720/480 quality ladder in the background after
+    # upload (stored next to the originals under .renditions/). The
+    # quality endpoints then serve the pre-built file with full Range
+    # support instead of live-transcoding per viewer. Off by default:
+    # it triples storage for the ladder.
+    PREGENERATE_RENDITIONS = os.environ.get("PREGENERATE_RENDITIONS") == "1"
+
+    # Server-side sessions (optional). Set SESSION_REDIS_URL to a Redis
+    # instance to move sessions out of the cookie; requires the
+    # Flask-Session and redis packages. Unset = default cookie sessions.
+    SESSION_REDIS_URL = os.environ.get("SESSION_REDIS_URL")
\ No newline at end of file
@@ -1,8 +1,75 @@
 import os
-from flask import Flask
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from flask import Flask, Request, current_app, request
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Optional server-side session support (Redis-backed). Cookie sessions
+# re-sign and re-parse the payload on every request and travel with
+# every HTTP round trip; a Redis store cuts that to a key lookup.
+try:
+    import redis
+    from flask_session import Session
+
+    SERVER_SESSIONS_AVAILABLE = True
+except ImportError:
+    SERVER_SESSIONS_AVAILABLE = False
+
+# expire_on_commit=False: handlers here commit and then either redirect
+# or keep using attributes they just wrote, so the post-commit refresh
+# SELECT SQLAlchemy issues by default is wasted work.
+db = SQLAlchemy(session_options={"expire_on_commit": False})
+
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    """
+    SQLite ships with foreign key enforcement off; enable it per
+    connection so the ON DELETE CASCADE clauses on child tables actually
+    fire when a video is deleted with a single DELETE statement.
+
+    WAL journaling lets readers proceed while a writer commits (the
+    default rollback journal blocks them), and synchronous=NORMAL drops
+    the per-commit fsync to one WAL append — a safe pairing with WAL.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+class StreamingUploadRequest(Request):
+    """
+    Request subclass that spools multipart file parts straight into a
+    scratch directory on the upload filesystem (with a large buffer)
+    instead of Werkzeug's default temp location. Saving a finished
+    upload then becomes a same-filesystem rename rather than a second
+    full copy of the file.
+    """
 
-db = SQLAlchemy()
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        tmp_dir = current_app.config.get("UPLOAD_TMP_DIR")
+        if tmp_dir:
+            spool = tempfile.NamedTemporaryFile(
+                "wb+", dir=tmp_dir, suffix=".part", delete=False
+            )
+            # Remembered so request teardown can reap spools the handler
+            # never moved into place (validation failures, early aborts).
+            if not hasattr(self, "_spooled_parts"):
+                self._spooled_parts = []
+            self._spooled_parts.append(spool.name)
+            return spool
+        return super()._get_file_stream(
+            total_content_length, content_type, filename, content_length
+        )
 
 
 def create_app(config_class=None):
@@ -17,10 +84,49 @@ def create_app(config_class=None):
     os.makedirs(app.config["THUMBNAIL_DIR"], exist_ok=True)
     os.makedirs(app.instance_path, exist_ok=True)
 
+    # Resolve the storage paths once; views use these instead of
+    # re-joining strings and re-running makedirs on every request.
+    app.config["VIDEO_UPLOAD_DIR_P"] = Path(app.config["VIDEO_UPLOAD_DIR"])
+    app.config["THUMBNAIL_DIR_P"] = Path(app.config["THUMBNAIL_DIR"])
+
+    # Scratch dir for in-flight uploads, kept on the upload filesystem so
+    # finished uploads can be renamed into place. Stale parts from
+    # crashed requests are swept at startup.
+    upload_tmp = app.config["VIDEO_UPLOAD_DIR_P"] / ".incoming"
+    os.makedirs(upload_tmp, exist_ok=True)
+    for stale in upload_tmp.glob("*.part"):
+        stale.unlink(missing_ok=True)
+    app.config["UPLOAD_TMP_DIR"] = str(upload_tmp)
+    app.request_class = StreamingUploadRequest
+
+    @app.teardown_request
+    def _reap_spooled_parts(exc):
+        """
+        Remove spooled upload parts the handler didn't consume. A
+        consumed part was os.replace'd away, so the unlink is a no-op;
+        anything still present would otherwise sit on disk until the
+        next startup sweep.
+        """
+        for part in getattr(request, "_spooled_parts", ()):
+            try:
+                os.unlink(part)
+            except OSError:
+                pass
+
+    # Redis-backed sessions when configured and the optional packages are
+    # installed; auth.py's session['user_id'] usage is unchanged.
+    if app.config.get("SESSION_REDIS_URL") and SERVER_SESSIONS_AVAILABLE:
+        app.config.setdefault("SESSION_TYPE", "redis")
+        app.config.setdefault(
+            "SESSION_REDIS", redis.Redis.from_url(app.config["SESSION_REDIS_URL"])
+        )
+        app.config.setdefault("SESSION_USE_SIGNER", True)
+        Session(app)
+
     db.init_app(app)
 
     from . import models  # noqa: F401
-    from .models import AppConfig
+    from .models import get_branding
     from .auth import auth_bp, current_user
     from .admin import admin_bp
     from .main import main_bp
@@ -39,21 +145,30 @@ def create_app(config_class=None):
         """
         user = current_user()
 
-        cfg = AppConfig.query.first()
-
-        registration_enabled = cfg.registration_enabled if cfg else True
-        site_name = (cfg.site_name if cfg and cfg.site_name else "MyTube")
-        footer_text = (cfg.footer_text if cfg and cfg.footer_text else "© MyTube")
+        branding = get_branding()
 
         return {
             "current_user": user,
-            "registration_enabled": registration_enabled,
-            "site_name": site_name,
-            "footer_text": footer_text,
+            "registration_enabled": branding["registration_enabled"],
+            "site_name": branding["site_name"],
+            "footer_text": branding["footer_text"],
         }
 
-    with app.app_context():
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create tables and seed the default admin user and config row."""
         db.create_all()
         models.init_default_admin_and_config()
+        print("Initialized the database.")
+
+    # One-shot bootstrap per process tree. The debug reloader and
+    # multi-worker servers otherwise replay the schema/seed queries in
+    # every spawned process; deployments can instead run `flask init-db`
+    # once and start workers with MYTUBE_BOOTSTRAPPED=1.
+    if os.environ.get("MYTUBE_BOOTSTRAPPED") != "1":
+        with app.app_context():
+            db.create_all()
+            models.init_default_admin_and_config()
+        os.environ["MYTUBE_BOOTSTRAPPED"] = "1"
 
     return app
@@ -1,8 +1,14 @@
 import os
 import json
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from uuid import uuid4
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
+from sqlalchemy.orm import load_only
 from flask import (
     Blueprint,
     render_template,
@@ -11,43 +17,35 @@ from flask import (
     url_for,
     flash,
     current_app,
+    g,
+    Response,
 )
 
 from . import db
-from .models import User, Video, AppConfig
+from .models import (
+    DEFAULT_DEEPSEEK_SYSTEM_PROMPT,
+    DEFAULT_DEEPSEEK_USER_PROMPT_TEMPLATE,
+    User,
+    Video,
+    AppConfig,
+    get_app_config,
+    invalidate_branding_cache,
+)
 from .auth import admin_required, current_user
-from .streaming import generate_video_thumbnail
+from .main import invalidate_related_cache
+from .streaming import (
+    generate_renditions,
+    generate_video_thumbnail,
+    get_video_duration,
+    guess_mime_type,
+    remove_renditions,
+)
 from .torrent_downloader import TorrentManager, LIBTORRENT_AVAILABLE
 
 admin_bp = Blueprint("admin", __name__, template_folder="templates/admin")
 
-
-DEFAULT_DEEPSEEK_SYSTEM_PROMPT = (
-    "You are an assistant that writes concise, engaging video "
-    "titles and descriptions for a video website."
-)
-
-DEFAULT_DEEPSEEK_USER_PROMPT_TEMPLATE = (
-    "You help write YouTube-style video titles and descriptions.\n\n"
-    "Given this video file name: \"{filename}\",\n"
-    "1. Generate a short, catchy title (max 80 characters).\n"
-    "2. Generate a 2–3 sentence description.\n\n"
-    "Respond ONLY as JSON like:\n"
-    "{\n"
-    '  \"title\": \"...\",\n'
-    '  \"description\": \"...\"\n'
-    "}\n"
-)
-
-
-def _get_site_config():
-    """
-    Small helper so we can easily pass branding info into templates.
-    """
-    cfg = AppConfig.query.first()
-    site_name = (cfg.site_name if cfg and cfg.site_name else "MyTube")
-    footer_text = (cfg.footer_text if cfg and cfg.footer_text else "© MyTube")
-    return site_name, footer_text
+# Accepted transcoding backends (see streaming.py)
+_VALID_BACKENDS = frozenset({"cpu", "intel", "amd", "nvidia"})
 
 
 def _get_torrent_manager() -> "TorrentManager":
@@ -56,50 +54,156 @@ def _get_torrent_manager() -> "TorrentManager":
     """
     mgr = current_app.extensions.get("torrent_manager")
     if mgr is None:
+        # Default the scratch space onto the upload filesystem so moving
+        # finished videos into place is a rename, not a byte copy.
         temp_root = current_app.config.get(
             "TORRENT_TEMP_DIR",
-            os.path.join(current_app.instance_path, "torrents"),
+            str(current_app.config["VIDEO_UPLOAD_DIR_P"] / ".torrents"),
+        )
+        mgr = TorrentManager(
+            temp_root=temp_root,
+            max_concurrent=current_app.config.get("MAX_CONCURRENT_TORRENTS", 4),
         )
-        mgr = TorrentManager(temp_root=temp_root)
         current_app.extensions["torrent_manager"] = mgr
     return mgr
 
 
-def _extract_json_block(text: str) -> str | None:
+def _get_deepseek_session() -> requests.Session:
+    """
+    Lazily create a pooled requests.Session for the DeepSeek API and keep
+    it on app.extensions (same pattern as the TorrentManager), so repeated
+    calls reuse the TCP/TLS connection instead of re-handshaking.
+    """
+    sess = current_app.extensions.get("deepseek_session")
+    if sess is None:
+        sess = requests.Session()
+        sess.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(total=2, backoff_factor=0.3),
+            ),
+        )
+        current_app.extensions["deepseek_session"] = sess
+    return sess
+
+
+def _get_thumb_pool() -> ThreadPoolExecutor:
+    """
+    Lazily create the background thumbnail pool and store it on
+    app.extensions (same pattern as the TorrentManager).
+    """
+    pool = current_app.extensions.get("thumb_pool")
+    if pool is None:
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumb")
+        current_app.extensions["thumb_pool"] = pool
+    return pool
+
+
+def _generate_and_store_thumb(app, video_id: int, video_path: str) -> None:
+    """
+    Worker for the thumbnail pool: generate a thumbnail for an already
+    committed video and attach it. Runs outside the request cycle.
+    """
+    with app.app_context():
+        # One ffprobe covers both the capture point and the persisted
+        # duration; later regenerations read the row instead.
+        duration = get_video_duration(str(video_path))
+        thumb = generate_video_thumbnail(video_path, duration=duration)
+        if thumb or duration is not None:
+            video = db.session.get(Video, video_id)
+            if video is None:
+                # Video was deleted while we were transcoding the frame.
+                if thumb:
+                    (app.config["THUMBNAIL_DIR_P"] / thumb).unlink(missing_ok=True)
+                return
+            if thumb:
+                video.thumbnail_filename = thumb
+            if duration is not None:
+                video.duration_seconds = duration
+            db.session.commit()
+        # No-op unless PREGENERATE_RENDITIONS is on.
+        generate_renditions(str(video_path))
+
+
+def _schedule_thumbnail(video_id: int, video_path: str) -> None:
+    app = current_app._get_current_object()
+    _get_thumb_pool().submit(_generate_and_store_thumb, app, video_id, video_path)
+
+
+def _save_upload(file, save_path) -> None:
+    """
+    Move an uploaded file into its final location.
+
+    With StreamingUploadRequest the part was already spooled onto the
+    upload filesystem, so this is normally just an os.replace — the bytes
+    are written exactly once. Falls back to a large-buffer copy when the
+    stream isn't a named file on disk (e.g. small in-memory parts).
+    Werkzeug already enforces MAX_CONTENT_LENGTH (413 on oversize), so no
+    size probe is needed here.
+    """
+    stream = file.stream
+    spooled_name = getattr(stream, "name", None)
+    if isinstance(spooled_name, str) and os.path.exists(spooled_name):
+        stream.close()
+        try:
+            os.replace(spooled_name, save_path)
+            return
+        except OSError:
+            # Cross-device rename; fall through to a buffered copy.
+            with open(spooled_name, "rb") as src, open(save_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, length=128 * 1024)
+            os.unlink(spooled_name)
+            return
+
+    with open(save_path, "wb") as dst:
+        shutil.copyfileobj(stream, dst, length=128 * 1024)
+
+
+# Reuse the system-message dict across calls; the prompt only changes
+# when an admin edits it in settings.
+_SYS_MSG_CACHE: dict = {}
+
+
+def _system_message(prompt: str) -> dict:
+    msg = _SYS_MSG_CACHE.get(prompt)
+    if msg is None:
+        if len(_SYS_MSG_CACHE) > 4:
+            _SYS_MSG_CACHE.clear()
+        msg = {"role": "system", "content": prompt}
+        _SYS_MSG_CACHE[prompt] = msg
+    return msg
+
+
+# Matches ``` / ```json fences at the start or end of the response
+_JSON_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json_obj(text: str) -> dict | None:
     """
     DeepSeek sometimes wraps JSON in ```json ... ``` or adds extra text.
-    Try to pull out a single JSON object from the text.
+    Strip the fences and decode the first JSON object in a single
+    left-to-right pass (raw_decode stops at the end of the object).
 
-    Returns the raw JSON string or None if nothing reasonable is found.
+    Returns the parsed dict or None if nothing reasonable is found.
     """
     if not text:
         return None
 
-    s = text.strip()
-
-    # Strip ``` fences if present
-    if s.startswith("```"):
-        lines = s.splitlines()
-        # Drop first line (``` or ```json)
-        lines = lines[1:]
-        # Drop last line if it's ``` alone
-        if lines and lines[-1].strip().startswith("```"):
-            lines = lines[:-1]
-        s = "\n".join(lines).strip()
-
-    # If the whole thing already looks like JSON, use it
-    if s.startswith("{") and s.endswith("}"):
-        return s
+    s = _JSON_FENCE_RE.sub("", text).strip()
 
-    # Otherwise, try to find the first {...} block
     start = s.find("{")
-    end = s.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        candidate = s[start : end + 1].strip()
-        if candidate.startswith("{") and candidate.endswith("}"):
-            return candidate
+    if start == -1:
+        return None
+
+    try:
+        obj, _end = _JSON_DECODER.raw_decode(s, start)
+    except ValueError:
+        return None
 
-    return None
+    return obj if isinstance(obj, dict) else None
 
 
 # -------------------- Dashboard & Settings --------------------
@@ -108,26 +212,25 @@ def _extract_json_block(text: str) -> str | None:
 @admin_bp.route("/")
 @admin_required
 def dashboard():
-    video_count = Video.query.count()
-    user_count = User.query.count()
-    cfg = AppConfig.query.first()
+    # Both counts in one round-trip via scalar subqueries.
+    video_count, user_count = db.session.query(
+        db.session.query(db.func.count(Video.id)).scalar_subquery(),
+        db.session.query(db.func.count(User.id)).scalar_subquery(),
+    ).one()
+    cfg = get_app_config()
 
     transcoding_backend = (cfg.transcoding_backend if cfg and cfg.transcoding_backend else "cpu").lower()
-    if transcoding_backend not in ("cpu", "intel", "amd", "nvidia"):
+    if transcoding_backend not in _VALID_BACKENDS:
         transcoding_backend = "cpu"
 
     registration_enabled = cfg.registration_enabled if cfg else True
 
-    site_name, footer_text = _get_site_config()
-
     return render_template(
         "admin/dashboard.html",
         video_count=video_count,
         user_count=user_count,
         registration_enabled=registration_enabled,
         transcoding_backend=transcoding_backend,
-        site_name=site_name,
-        footer_text=footer_text,
     )
 
 
@@ -137,11 +240,12 @@ def settings():
     """
     Global settings page (registration, DeepSeek, branding, transcoding).
     """
-    cfg = AppConfig.query.first()
+    cfg = get_app_config()
     if cfg is None:
         cfg = AppConfig(registration_enabled=True, transcoding_backend="cpu")
         db.session.add(cfg)
         db.session.commit()
+        g._app_config = cfg
 
     if request.method == "POST":
         cfg.registration_enabled = bool(request.form.get("registration_enabled"))
@@ -162,17 +266,18 @@ def settings():
         cfg.footer_text = (request.form.get("footer_text") or "").strip() or None
 
         backend = (request.form.get("transcoding_backend") or "cpu").strip().lower()
-        if backend not in ("cpu", "intel", "amd", "nvidia"):
+        if backend not in _VALID_BACKENDS:
             backend = "cpu"
         cfg.transcoding_backend = backend
 
         db.session.commit()
+        invalidate_branding_cache()
+        # Next stream start re-reads the backend from the fresh row.
+        current_app.extensions.pop("transcoding_backend", None)
         flash("Settings updated.", "success")
         return redirect(url_for("admin.settings"))
 
     # GET: render settings form with current values
-    site_name, footer_text = _get_site_config()
-
     deepseek_system_prompt = (
         cfg.deepseek_system_prompt if cfg.deepseek_system_prompt else DEFAULT_DEEPSEEK_SYSTEM_PROMPT
     )
@@ -183,7 +288,7 @@ def settings():
     )
 
     transcoding_backend = (cfg.transcoding_backend if cfg.transcoding_backend else "cpu").lower()
-    if transcoding_backend not in ("cpu", "intel", "amd", "nvidia"):
+    if transcoding_backend not in _VALID_BACKENDS:
         transcoding_backend = "cpu"
 
     return render_template(
@@ -192,8 +297,6 @@ def settings():
         deepseek_api_key=(cfg.deepseek_api_key or ""),
         deepseek_system_prompt=deepseek_system_prompt,
         deepseek_user_prompt_template=deepseek_user_prompt_template,
-        site_name=site_name,
-        footer_text=footer_text,
         transcoding_backend=transcoding_backend,
     )
 
@@ -207,21 +310,27 @@ def videos():
     """
     Page for listing/managing videos.
     """
-    videos = Video.query.order_by(Video.uploaded_at.desc()).all()
-    site_name, footer_text = _get_site_config()
-    return render_template(
-        "admin/videos.html",
-        videos=videos,
-        site_name=site_name,
-        footer_text=footer_text,
+    # The listing only renders a handful of columns; don't hydrate the rest.
+    videos = (
+        Video.query.options(
+            load_only(
+                Video.id,
+                Video.title,
+                Video.description,
+                Video.filename,
+                Video.uploaded_at,
+                Video.view_count,
+            )
+        )
+        .order_by(Video.uploaded_at.desc())
+        .all()
     )
+    return render_template("admin/videos.html", videos=videos)
 
 
 @admin_bp.route("/upload", methods=["GET", "POST"])
 @admin_required
 def upload_video():
-    site_name, footer_text = _get_site_config()
-
     if request.method == "POST":
         title = (request.form.get("title") or "").strip()
         description = (request.form.get("description") or "").strip()
@@ -229,41 +338,34 @@ def upload_video():
 
         if not title or not file:
             flash("Title and video file are required.", "danger")
-            return render_template("admin/upload.html", site_name=site_name, footer_text=footer_text)
-
-        file.seek(0, os.SEEK_END)
-        size = file.tell()
-        file.seek(0)
-        max_size = current_app.config.get("MAX_CONTENT_LENGTH", 15 * 1024 * 1024 * 1024)
-        if size > max_size:
-            flash("File exceeds size limit.", "danger")
-            return render_template("admin/upload.html", site_name=site_name, footer_text=footer_text)
+            return render_template("admin/upload.html")
 
         ext = os.path.splitext(file.filename or "")[1]
         new_name = f"{uuid4().hex}{ext}"
-        video_dir = current_app.config["VIDEO_UPLOAD_DIR"]
-        os.makedirs(video_dir, exist_ok=True)
-        save_path = os.path.join(video_dir, new_name)
-        file.save(save_path)
+        save_path = current_app.config["VIDEO_UPLOAD_DIR_P"] / new_name
+        _save_upload(file, save_path)
 
         video = Video(
             title=title,
             description=description,
             filename=new_name,
+            content_type=guess_mime_type(new_name),
+            file_size=save_path.stat().st_size,
             uploader_id=current_user().id,
         )
 
-        # Generate thumbnail if possible
-        thumb = generate_video_thumbnail(save_path)
-        if thumb:
-            video.thumbnail_filename = thumb
-
         db.session.add(video)
         db.session.commit()
+        invalidate_related_cache()
+
+        # Thumbnail is generated in the background so the response isn't
+        # blocked on ffmpeg.
+        _schedule_thumbnail(video.id, save_path)
+
         flash("Video uploaded.", "success")
         return redirect(url_for("admin.videos"))
 
-    return render_template("admin/upload.html", site_name=site_name, footer_text=footer_text)
+    return render_template("admin/upload.html")
 
 
 @admin_bp.route("/mass_upload", methods=["GET", "POST"])
@@ -273,8 +375,6 @@ def mass_upload():
     Mass upload endpoint used by JS on the mass_upload page.
     POST: single file (AJAX), returns JSON.
     """
-    site_name, footer_text = _get_site_config()
-
     if request.method == "POST":
         file = request.files.get("file")
         if not file:
@@ -283,42 +383,35 @@ def mass_upload():
         original_name = file.filename or ""
         title = os.path.splitext(os.path.basename(original_name))[0].strip() or "Untitled"
 
-        file.seek(0, os.SEEK_END)
-        size = file.tell()
-        file.seek(0)
-        max_size = current_app.config.get("MAX_CONTENT_LENGTH", 15 * 1024 * 1024 * 1024)
-        if size > max_size:
-            return {"error": "File exceeds size limit."}, 400
-
         ext = os.path.splitext(original_name)[1]
         new_name = f"{uuid4().hex}{ext}"
-        video_dir = current_app.config["VIDEO_UPLOAD_DIR"]
-        os.makedirs(video_dir, exist_ok=True)
-        save_path = os.path.join(video_dir, new_name)
-        file.save(save_path)
+        save_path = current_app.config["VIDEO_UPLOAD_DIR_P"] / new_name
+        _save_upload(file, save_path)
 
         video = Video(
             title=title,
             description="",
             filename=new_name,
+            content_type=guess_mime_type(new_name),
+            file_size=save_path.stat().st_size,
             uploader_id=current_user().id,
         )
 
-        thumb = generate_video_thumbnail(save_path)
-        if thumb:
-            video.thumbnail_filename = thumb
-
         db.session.add(video)
         db.session.commit()
+        invalidate_related_cache()
+
+        _schedule_thumbnail(video.id, save_path)
 
         return {
             "success": True,
             "video_id": video.id,
             "title": video.title,
             "filename": video.filename,
+            "thumbnail_pending": True,
         }
 
-    return render_template("admin/mass_upload.html", site_name=site_name, footer_text=footer_text)
+    return render_template("admin/mass_upload.html")
 
 
 @admin_bp.route("/discover", methods=["GET", "POST"])
@@ -327,16 +420,13 @@ def discover_videos():
     """
     Discover files present on disk but not in the DB.
     """
-    site_name, footer_text = _get_site_config()
-
-    video_dir = current_app.config["VIDEO_UPLOAD_DIR"]
-    os.makedirs(video_dir, exist_ok=True)
+    video_dir = current_app.config["VIDEO_UPLOAD_DIR_P"]
 
-    existing_filenames = {v.filename for v in Video.query.all()}
-    all_files = [
-        f for f in os.listdir(video_dir)
-        if os.path.isfile(os.path.join(video_dir, f))
-    ]
+    # Only the filename column is needed; skip hydrating Video objects.
+    existing_filenames = {row[0] for row in db.session.query(Video.filename).all()}
+    # scandir caches the file type on the DirEntry, avoiding one stat per file
+    with os.scandir(video_dir) as entries:
+        all_files = [e.name for e in entries if e.is_file()]
     missing_files = [f for f in all_files if f not in existing_filenames]
 
     if request.method == "POST":
@@ -345,38 +435,67 @@ def discover_videos():
             flash("No files selected.", "warning")
             return redirect(url_for("admin.discover_videos"))
 
-        count = 0
-        for fname in selected:
-            path = os.path.join(video_dir, fname)
-            if not os.path.exists(path):
-                continue
-
-            title = os.path.splitext(os.path.basename(fname))[0].strip() or "Untitled"
-
-            video = Video(
-                title=title,
-                description="",
-                filename=fname,
-                uploader_id=current_user().id,
-            )
+        # The scandir pass above already told us what exists on disk.
+        on_disk = set(all_files)
+        to_import = [
+            (fname, video_dir / fname) for fname in selected if fname in on_disk
+        ]
+
+        # Thumbnail generation (ffmpeg) is the slow step — run it in
+        # parallel and keep all DB work on the request thread.
+        app = current_app._get_current_object()
+
+        def _thumb(path):
+            with app.app_context():
+                duration = get_video_duration(str(path))
+                return generate_video_thumbnail(path, duration=duration), duration
+
+        thumbs = {}
+        if to_import:
+            with ThreadPoolExecutor(
+                max_workers=min(len(to_import), os.cpu_count() or 2)
+            ) as pool:
+                futures = {
+                    pool.submit(_thumb, path): fname for fname, path in to_import
+                }
+                for fut in as_completed(futures):
+                    thumbs[futures[fut]] = fut.result()
+
+        uploader_id = current_user().id
+        rows = [
+            {
+                "title": os.path.splitext(os.path.basename(fname))[0].strip() or "Untitled",
+                "description": "",
+                "filename": fname,
+                "content_type": guess_mime_type(fname),
+                "file_size": _path.stat().st_size,
+                "uploader_id": uploader_id,
+                "thumbnail_filename": thumbs.get(fname, (None, None))[0],
+                "duration_seconds": thumbs.get(fname, (None, None))[1],
+            }
+            for fname, _path in to_import
+        ]
+        # Bulk path skips per-object unit-of-work bookkeeping, which adds
+        # up when importing hundreds of files at once.
+        if rows:
+            db.session.bulk_insert_mappings(Video, rows)
+        db.session.commit()
+        invalidate_related_cache()
 
-            thumb = generate_video_thumbnail(path)
-            if thumb:
-                video.thumbnail_filename = thumb
+        # Pre-encode the quality ladder in the background (no-op unless
+        # PREGENERATE_RENDITIONS is enabled).
+        def _rend(path):
+            with app.app_context():
+                generate_renditions(str(path))
 
-            db.session.add(video)
-            count += 1
+        rend_pool = _get_thumb_pool()
+        for _fname, path in to_import:
+            rend_pool.submit(_rend, path)
 
-        db.session.commit()
-        flash(f"Imported {count} file(s).", "success")
+        flash(f"Imported {len(to_import)} file(s).", "success")
         return redirect(url_for("admin.videos"))
 
-    return render_template(
-        "admin/discover.html",
-        missing_files=missing_files,
-        site_name=site_name,
-        footer_text=footer_text,
-    )
+    return render_template("admin/discover.html", missing_files=missing_files)
 
 
 # -------------------- Users --------------------
@@ -388,8 +507,6 @@ def manage_users():
     """
     List users and handle creation, admin toggle, ban/unban, delete.
     """
-    site_name, footer_text = _get_site_config()
-
     if request.method == "POST":
         action = request.form.get("action")
 
@@ -464,12 +581,7 @@ def manage_users():
         return redirect(url_for("admin.manage_users"))
 
     users = User.query.order_by(User.created_at.desc()).all()
-    return render_template(
-        "admin/users.html",
-        users=users,
-        site_name=site_name,
-        footer_text=footer_text,
-    )
+    return render_template("admin/users.html", users=users)
 
 
 # -------------------- Video edit / AI / thumbnails --------------------
@@ -479,20 +591,13 @@ def manage_users():
 @admin_required
 def edit_video(video_id):
     video = Video.query.get_or_404(video_id)
-    site_name, footer_text = _get_site_config()
-
     if request.method == "POST":
         title = (request.form.get("title") or "").strip()
         description = (request.form.get("description") or "").strip()
 
         if not title:
             flash("Title cannot be empty.", "danger")
-            return render_template(
-                "admin/edit_video.html",
-                video=video,
-                site_name=site_name,
-                footer_text=footer_text,
-            )
+            return render_template("admin/edit_video.html", video=video)
 
         video.title = title
         video.description = description
@@ -500,7 +605,7 @@ def edit_video(video_id):
         flash("Video updated.", "success")
         return redirect(url_for("admin.videos"))
 
-    return render_template("admin/edit_video.html", video=video, site_name=site_name, footer_text=footer_text)
+    return render_template("admin/edit_video.html", video=video)
 
 
 @admin_bp.route("/videos/<int:video_id>/delete", methods=["POST"])
@@ -508,25 +613,28 @@ def edit_video(video_id):
 def delete_video(video_id):
     video = Video.query.get_or_404(video_id)
 
-    video_dir = current_app.config["VIDEO_UPLOAD_DIR"]
-    path = os.path.join(video_dir, video.filename)
-    if os.path.exists(path):
+    # unlink(missing_ok=True) skips the extra stat an exists() pre-check
+    # would cost; a missing file is fine either way.
+    path = current_app.config["VIDEO_UPLOAD_DIR_P"] / video.filename
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        current_app.logger.warning("Could not remove video file %s", path)
+    remove_renditions(str(path))
+
+    if video.thumbnail_filename:
+        thumb_path = current_app.config["THUMBNAIL_DIR_P"] / video.thumbnail_filename
         try:
-            os.remove(path)
+            thumb_path.unlink(missing_ok=True)
         except OSError:
-            current_app.logger.warning("Could not remove video file %s", path)
+            current_app.logger.warning("Could not remove thumbnail %s", thumb_path)
 
-    if video.thumbnail_filename:
-        thumb_dir = current_app.config["THUMBNAIL_DIR"]
-        thumb_path = os.path.join(thumb_dir, video.thumbnail_filename)
-        if os.path.exists(thumb_path):
-            try:
-                os.remove(thumb_path)
-            except OSError:
-                current_app.logger.warning("Could not remove thumbnail %s", thumb_path)
-
-    db.session.delete(video)
+    # Single DELETE; child rows (likes, comments, watch history) are
+    # removed by the database-level ON DELETE CASCADE instead of the ORM
+    # loading and deleting them one by one.
+    Video.query.filter_by(id=video_id).delete(synchronize_session=False)
     db.session.commit()
+    invalidate_related_cache()
     flash("Video deleted.", "success")
     return redirect(url_for("admin.videos"))
 
@@ -539,7 +647,7 @@ def ai_video_metadata(video_id):
     based on the video filename. Applies changes directly to the video.
     """
     video = Video.query.get_or_404(video_id)
-    cfg = AppConfig.query.first()
+    cfg = get_app_config()
 
     if not cfg or not cfg.deepseek_api_key:
         flash(
@@ -556,24 +664,28 @@ def ai_video_metadata(video_id):
     # Only replace the {filename} placeholder, do NOT use .format()
     user_prompt = user_template.replace("{filename}", video.filename)
 
+    # Serialize the payload compactly ourselves instead of going through
+    # requests' json= path (which pretty-separates multi-KB prompts).
+    body = json.dumps(
+        {
+            "model": "deepseek-chat",
+            "messages": [
+                _system_message(system_prompt),
+                {"role": "user", "content": user_prompt},
+            ],
+            "max_tokens": 300,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
     try:
-        resp = requests.post(
+        resp = _get_deepseek_session().post(
             "https://api.deepseek.com/chat/completions",
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             },
-            json={
-                "model": "deepseek-chat",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_prompt,
-                    },
-                    {"role": "user", "content": user_prompt},
-                ],
-                "max_tokens": 300,
-            },
+            data=body,
             timeout=20,
         )
         resp.raise_for_status()
@@ -585,11 +697,10 @@ def ai_video_metadata(video_id):
 
     try:
         content = data["choices"][0]["message"]["content"]
-        raw_json = _extract_json_block(content)
-        if not raw_json:
+        parsed = _extract_json_obj(content)
+        if parsed is None:
             raise ValueError("No JSON object found in DeepSeek response")
 
-        parsed = json.loads(raw_json)
         new_title = parsed.get("title") or video.title or os.path.splitext(video.filename)[0]
         new_description = parsed.get("description") or (video.description or "")
     except Exception as exc:
@@ -621,31 +732,35 @@ def regenerate_thumbnail(video_id):
     """
     video = Video.query.get_or_404(video_id)
 
-    video_dir = current_app.config["VIDEO_UPLOAD_DIR"]
-    thumb_dir = current_app.config["THUMBNAIL_DIR"]
-
-    video_path = os.path.join(video_dir, video.filename)
+    video_path = current_app.config["VIDEO_UPLOAD_DIR_P"] / video.filename
     if not os.path.exists(video_path):
         return {"success": False, "error": "Video file is missing on disk."}, 400
 
     old_thumb = video.thumbnail_filename
 
-    new_thumb = generate_video_thumbnail(video_path)
+    # Reuse the persisted duration instead of re-probing; rows from
+    # before the column existed get probed once and backfilled here.
+    duration = video.duration_seconds
+    if duration is None:
+        duration = get_video_duration(str(video_path))
+
+    new_thumb = generate_video_thumbnail(video_path, duration=duration)
     if not new_thumb:
         current_app.logger.warning("Failed to generate thumbnail for video %s", video.id)
         return {"success": False, "error": "Thumbnail generation failed."}, 500
 
     video.thumbnail_filename = new_thumb
+    if video.duration_seconds is None and duration is not None:
+        video.duration_seconds = duration
     db.session.commit()
 
     # Remove old thumbnail file if present
     if old_thumb:
-        old_path = os.path.join(thumb_dir, old_thumb)
-        if os.path.exists(old_path):
-            try:
-                os.remove(old_path)
-            except OSError:
-                current_app.logger.warning("Could not remove old thumbnail %s", old_path)
+        old_path = current_app.config["THUMBNAIL_DIR_P"] / old_thumb
+        try:
+            old_path.unlink(missing_ok=True)
+        except OSError:
+            current_app.logger.warning("Could not remove old thumbnail %s", old_path)
 
     return {"success": True, "thumbnail": new_thumb}
 
@@ -661,7 +776,6 @@ def torrents():
     - Start new downloads from magnet links.
     - Show current jobs and progress.
     """
-    site_name, footer_text = _get_site_config()
     mgr = _get_torrent_manager()
 
     default_exts = current_app.config.get(
@@ -692,8 +806,6 @@ def torrents():
     return render_template(
         "admin/torrents.html",
         jobs=jobs,
-        site_name=site_name,
-        footer_text=footer_text,
         default_video_exts=default_exts,
         libtorrent_available=LIBTORRENT_AVAILABLE,
     )
@@ -703,10 +815,12 @@ def torrents():
 @admin_required
 def torrents_status():
     """
-    JSON endpoint polled by the UI to update torrent progress.
+    JSON endpoint polled by the UI to update torrent progress. The
+    manager hands back pre-serialized bytes, so steady-state polls skip
+    jsonify entirely.
     """
     mgr = _get_torrent_manager()
-    return {"jobs": mgr.list_jobs()}
+    return Response(mgr.list_jobs_json(), mimetype="application/json")
 
 
 @admin_bp.route("/torrents/<job_id>/delete", methods=["POST"])
@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import (
     Blueprint,
+    g,
     render_template,
     request,
     redirect,
@@ -15,10 +16,14 @@ auth_bp = Blueprint("auth", __name__)
 
 
 def current_user():
+    # Memoized on `g`: decorators, view bodies and the context processor
+    # all call this, and only the first call per request should hit the
+    # session machinery. None (anonymous) is cached too.
+    if "current_user" in g:
+        return g.current_user
     uid = session.get("user_id")
-    if not uid:
-        return None
-    return User.query.get(uid)
+    g.current_user = User.query.get(uid) if uid else None
+    return g.current_user
 
 
 def login_required(view):
@@ -87,7 +92,12 @@ def register():
         if not email or not password:
             flash("Email and password required.", "danger")
             return render_template("register.html")
-        if User.query.filter_by(email=email).first():
+        # EXISTS subquery: no need to hydrate a User row just to check
+        # whether the email is taken.
+        email_taken = db.session.query(
+            User.query.filter_by(email=email).exists()
+        ).scalar()
+        if email_taken:
             flash("Email already registered.", "danger")
             return render_template("register.html")
 
@@ -1,11 +1,17 @@
 import os
+import time
 from datetime import datetime
+from urllib.parse import quote
+from threading import Lock
+from types import SimpleNamespace
 
 from flask import (
     Blueprint,
+    Response,
     render_template,
     current_app,
     abort,
+    send_file,
     send_from_directory,
     request,
     redirect,
@@ -13,6 +19,9 @@ from flask import (
     flash,
 )
 
+from sqlalchemy.orm import raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
 from .models import Video, WatchHistory, VideoLike, Comment, CommentLike, User
 from .streaming import range_request_response, guess_mime_type
 from .auth import current_user, login_required
@@ -21,6 +30,126 @@ from . import db
 main_bp = Blueprint("main", __name__)
 
 
+def _video_sort_clause(sort):
+    """Map the index `sort` query param onto an ORDER BY clause."""
+    if sort == "oldest":
+        return Video.uploaded_at.asc()
+    if sort == "title_asc":
+        return db.func.lower(Video.title).asc()
+    if sort == "title_desc":
+        return db.func.lower(Video.title).desc()
+    # "newest" or unknown
+    return Video.uploaded_at.desc()
+
+
+def _apply_search(q, query):
+    """Apply the free-text search filter to a Video query."""
+    like = f"%{query}%"
+    return q.filter(
+        db.or_(Video.title.ilike(like), Video.description.ilike(like))
+    )
+
+
+# View counts are accumulated in memory and flushed to the database in
+# batches, so a hot video costs one UPDATE per flush interval instead of
+# one per page view. Pending counts are added back at render time, so
+# displayed numbers stay exact.
+_VIEW_FLUSH_INTERVAL = 30.0
+_pending_views = {}  # video_id -> views not yet written to the DB
+_pending_views_lock = Lock()
+_last_view_flush = time.monotonic()
+
+
+def _note_view(video_id):
+    """Count a view in memory; returns the video's pending total."""
+    with _pending_views_lock:
+        n = _pending_views.get(video_id, 0) + 1
+        _pending_views[video_id] = n
+    return n
+
+
+def _stage_view_flush():
+    """
+    Every _VIEW_FLUSH_INTERVAL seconds, turn the accumulated counters
+    into atomic `view_count = view_count + n` UPDATEs on the current
+    session. The caller's commit makes them durable.
+    """
+    global _last_view_flush
+    now = time.monotonic()
+    if now - _last_view_flush < _VIEW_FLUSH_INTERVAL:
+        return
+    with _pending_views_lock:
+        if now - _last_view_flush < _VIEW_FLUSH_INTERVAL:
+            return
+        pending = dict(_pending_views)
+        _pending_views.clear()
+        _last_view_flush = now
+    for vid, n in pending.items():
+        Video.query.filter_by(id=vid).update(
+            {Video.view_count: db.func.coalesce(Video.view_count, 0) + n},
+            synchronize_session=False,
+        )
+
+
+# Watched-video ids per user, used only for membership checks (the
+# "watched" badges on the index grid). Warmed from the database on first
+# use, then maintained incrementally by video_detail so the index page
+# doesn't re-select the whole watch history on every load.
+_watched_cache = {}  # user_id -> set of video ids
+
+
+def _watched_ids_for(user_id):
+    ids = _watched_cache.get(user_id)
+    if ids is None:
+        if len(_watched_cache) > 512:
+            _watched_cache.clear()
+        ids = {
+            vid
+            for (vid,) in db.session.query(WatchHistory.video_id)
+            .filter_by(user_id=user_id)
+            .all()
+        }
+        _watched_cache[user_id] = ids
+    return ids
+
+
+def _record_watched(user_id, video_id):
+    ids = _watched_cache.get(user_id)
+    if ids is not None:
+        ids.add(video_id)
+
+
+# The "Up next" sidebar is the same newest-first list for every viewer
+# and only changes when the library does, so the id list is cached
+# process-wide. Admin upload/discover/delete paths invalidate it.
+_RELATED_TTL = 300.0
+_related_cache = None  # (expires_at, [newest 11 video ids])
+
+
+def invalidate_related_cache():
+    """Drop the cached sidebar ids (called when videos come or go)."""
+    global _related_cache
+    _related_cache = None
+
+
+def _latest_video_ids():
+    global _related_cache
+    now = time.monotonic()
+    cached = _related_cache
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    ids = [
+        vid
+        for (vid,) in db.session.query(Video.id)
+        .order_by(Video.uploaded_at.desc())
+        .limit(11)
+        .all()
+    ]
+    _related_cache = (now + _RELATED_TTL, ids)
+    return ids
+
+
 @main_bp.route("/")
 def index():
     user = current_user()
@@ -64,89 +193,64 @@ def index():
     is_history_view = tab == "history"
     is_liked_view = tab == "liked"
 
-    # Base list of videos depending on tab
+    last_watched_map = {}
+
+    # Base query depending on tab. History and liked join through the
+    # per-user tables so filtering, ordering and pagination all happen in
+    # one SQL query instead of loading entries and reordering in Python.
     if is_history_view:
-        # History: keep order by last watched
-        history_entries = (
-            WatchHistory.query.filter_by(user_id=user.id)
-            .order_by(WatchHistory.last_watched_at.desc())
-            .all()
+        vq = (
+            db.session.query(Video, WatchHistory.last_watched_at)
+            .join(WatchHistory, WatchHistory.video_id == Video.id)
+            .filter(WatchHistory.user_id == user.id)
         )
-        video_ids = [h.video_id for h in history_entries]
-        if not video_ids:
-            videos = []
-            last_watched_map = {}
-        else:
-            videos_by_id = {
-                v.id: v for v in Video.query.filter(Video.id.in_(video_ids)).all()
-            }
-            videos = [videos_by_id[vid] for vid in video_ids if vid in videos_by_id]
-            # Map for last watched times
-            last_watched_map = {h.video_id: h.last_watched_at for h in history_entries}
-
+        recency_order = WatchHistory.last_watched_at.desc()
     elif is_liked_view:
-        # Liked videos tab
-        like_entries = (
-            VideoLike.query.filter_by(user_id=user.id, is_like=True)
-            .order_by(VideoLike.created_at.desc())
-            .all()
+        vq = Video.query.join(VideoLike, VideoLike.video_id == Video.id).filter(
+            VideoLike.user_id == user.id, VideoLike.is_like.is_(True)
         )
-        video_ids = [l.video_id for l in like_entries]
-        if not video_ids:
-            videos = []
-        else:
-            videos_by_id = {
-                v.id: v for v in Video.query.filter(Video.id.in_(video_ids)).all()
-            }
-            videos = [videos_by_id[vid] for vid in video_ids if vid in videos_by_id]
-        last_watched_map = {}
+        recency_order = VideoLike.created_at.desc()
     else:
-        # Home: all videos
-        videos = Video.query.order_by(Video.uploaded_at.desc()).all()
-        last_watched_map = {}
+        vq = Video.query
+        recency_order = None
 
-    # Search filter (in-memory on already selected list)
     if query:
-        q_lower = query.lower()
-        videos = [
-            v
-            for v in videos
-            if (v.title and q_lower in v.title.lower())
-            or (v.description and q_lower in v.description.lower())
-        ]
-
-    # Sorting
-    def uploaded_key(v):
-        return v.uploaded_at or datetime.min
+        vq = _apply_search(vq, query)
 
-    if sort == "oldest":
-        videos.sort(key=uploaded_key)
-    elif sort == "title_asc":
-        videos.sort(key=lambda v: (v.title or "").lower())
-    elif sort == "title_desc":
-        videos.sort(key=lambda v: (v.title or "").lower(), reverse=True)
-    else:  # "newest" or unknown
-        videos.sort(key=uploaded_key, reverse=True)
-
-    # Pagination (6 per page)
-    total_videos = len(videos)
-    total_pages = max(1, (total_videos + per_page - 1) // per_page) if total_videos else 1
+    # "newest" on history/liked means most recently watched/liked first;
+    # the explicit sorts behave the same on every tab.
+    if recency_order is not None and sort not in ("oldest", "title_asc", "title_desc"):
+        vq = vq.order_by(recency_order)
+    else:
+        vq = vq.order_by(_video_sort_clause(sort))
+
+    # Without a search filter the history total is just the number of
+    # WatchHistory rows; skip the join for the COUNT in that case.
+    if is_history_view and not query:
+        total_videos = (
+            db.session.query(db.func.count(WatchHistory.id))
+            .filter_by(user_id=user.id)
+            .scalar()
+        )
+    else:
+        total_videos = (
+            vq.order_by(None).with_entities(db.func.count(Video.id)).scalar()
+        )
+    total_pages = max(1, (total_videos + per_page - 1) // per_page)
     if page < 1:
         page = 1
     if page > total_pages:
         page = total_pages
 
-    start = (page - 1) * per_page
-    end = start + per_page
-    page_videos = videos[start:end]
+    rows = vq.limit(per_page).offset((page - 1) * per_page).all()
+    if is_history_view:
+        page_videos = [video for video, _ in rows]
+        last_watched_map = {video.id: watched_at for video, watched_at in rows}
+    else:
+        page_videos = rows
 
     # Watched IDs for badges
-    watched_ids = set(
-        vid_id
-        for (vid_id,) in db.session.query(WatchHistory.video_id)
-        .filter_by(user_id=user.id)
-        .all()
-    )
+    watched_ids = _watched_ids_for(user.id)
 
     return render_template(
         "index.html",
@@ -179,24 +283,32 @@ def video_detail(video_id):
 
     video = Video.query.get_or_404(video_id)
 
-    # Increment view count
-    video.view_count = (video.view_count or 0) + 1
-    db.session.commit()
-
-    # Update watch history
-    hist = WatchHistory.query.filter_by(user_id=user.id, video_id=video.id).first()
-    if not hist:
-        hist = WatchHistory(user_id=user.id, video_id=video.id)
-        db.session.add(hist)
-    hist.last_watched_at = datetime.utcnow()
+    # Count the view in memory and piggyback any due batch flush on this
+    # request's transaction. The loaded row predates this interval's
+    # pending views, so DB value + pending is the accurate display count.
+    pending = _note_view(video.id)
+    _stage_view_flush()
+    set_committed_value(video, "view_count", (video.view_count or 0) + pending)
+
+    # Upsert watch history: targeted UPDATE first, INSERT only when the
+    # user has never watched this video. One commit covers both writes.
+    now = datetime.utcnow()
+    updated = WatchHistory.query.filter_by(user_id=user.id, video_id=video.id).update(
+        {WatchHistory.last_watched_at: now}, synchronize_session=False
+    )
+    if not updated:
+        db.session.add(
+            WatchHistory(user_id=user.id, video_id=video.id, last_watched_at=now)
+        )
     db.session.commit()
+    _record_watched(user.id, video.id)
 
     # Determine MIME type (AVI, MP4, WEBM, etc.)
     mime_type = video.content_type or guess_mime_type(video.filename)
 
-    # Likes / dislikes counts
-    likes_count = VideoLike.query.filter_by(video_id=video.id, is_like=True).count()
-    dislikes_count = VideoLike.query.filter_by(video_id=video.id, is_like=False).count()
+    # Likes / dislikes from the denormalized counters on the video row
+    likes_count = video.like_count or 0
+    dislikes_count = video.dislike_count or 0
 
     # User like/dislike state
     user_like = VideoLike.query.filter_by(video_id=video.id, user_id=user.id).first()
@@ -207,41 +319,60 @@ def video_detail(video_id):
     else:
         user_like_state = "dislike"
 
-    # Top-level comments for this video
-    comments = (
-        Comment.query.filter_by(video_id=video.id, parent_comment_id=None)
+    # Load the whole comment tree for the video in one query (authors
+    # batched via selectinload) and wire up the reply collections in
+    # Python, so the recursive reply macro never triggers per-comment
+    # SELECTs. In debug, raiseload turns any remaining implicit lazy load
+    # into an error so new N+1s surface during development.
+    comment_opts = [selectinload(Comment.user)]
+    if current_app.debug:
+        comment_opts.append(raiseload("*"))
+    all_comments = (
+        Comment.query.options(*comment_opts)
+        .filter_by(video_id=video.id)
         .order_by(Comment.created_at.desc())
         .all()
     )
-    comment_ids = [c.id for c in comments]
-
-    # Like counts per comment
+    by_parent = {}
+    for c in all_comments:
+        by_parent.setdefault(c.parent_comment_id, []).append(c)
+    for c in all_comments:
+        set_committed_value(c, "replies", by_parent.get(c.id, []))
+    comments = by_parent.get(None, [])
+    comment_ids = [c.id for c in all_comments]
+
+    # Like counts per comment and "liked by me" flags from one grouped
+    # query (MAX over a CASE stands in for BOOL_OR, which SQLite lacks).
+    likes_by_comment = {}
+    user_comment_likes = set()
     if comment_ids:
         rows = (
-            db.session.query(CommentLike.comment_id, db.func.count(CommentLike.id))
+            db.session.query(
+                CommentLike.comment_id,
+                db.func.count(CommentLike.id),
+                db.func.max(db.case((CommentLike.user_id == user.id, 1), else_=0)),
+            )
             .filter(CommentLike.comment_id.in_(comment_ids))
             .group_by(CommentLike.comment_id)
             .all()
         )
-        likes_by_comment = {cid: cnt for cid, cnt in rows}
+        for cid, cnt, liked_by_me in rows:
+            likes_by_comment[cid] = cnt
+            if liked_by_me:
+                user_comment_likes.add(cid)
+
+    # Related / "Up next" videos (like YouTube sidebar): resolve from the
+    # cached newest-11 id list, dropping the video being watched.
+    related_ids = [vid for vid in _latest_video_ids() if vid != video.id][:10]
+    if related_ids:
+        related_by_id = {
+            v.id: v for v in Video.query.filter(Video.id.in_(related_ids)).all()
+        }
+        related_videos = [
+            related_by_id[vid] for vid in related_ids if vid in related_by_id
+        ]
     else:
-        likes_by_comment = {}
-
-    # Which comments the current user has liked
-    user_comment_likes = set(
-        cid
-        for (cid,) in db.session.query(CommentLike.comment_id)
-        .filter_by(user_id=user.id)
-        .all()
-    )
-
-    # Related / "Up next" videos (like YouTube sidebar)
-    related_videos = (
-        Video.query.filter(Video.id != video.id)
-        .order_by(Video.uploaded_at.desc())
-        .limit(10)
-        .all()
-    )
+        related_videos = []
 
     return render_template(
         "video_detail.html",
@@ -268,36 +399,64 @@ def like_video(video_id):
         )
         return redirect(url_for("main.video_detail", video_id=video_id))
 
-    video = Video.query.get_or_404(video_id)
+    # Existence check only; the full Video row isn't needed to record a like.
+    if db.session.query(Video.id).filter_by(id=video_id).scalar() is None:
+        abort(404)
     action = request.form.get("action")
 
     if action not in ("like", "dislike"):
         flash("Invalid action.", "danger")
         return redirect(url_for("main.video_detail", video_id=video_id))
 
-    existing = VideoLike.query.filter_by(video_id=video.id, user_id=user.id).first()
+    # Toggle with one narrow SELECT plus one targeted write statement,
+    # instead of hydrating the VideoLike row for the unit-of-work to diff.
+    is_like = action == "like"
+    prev = (
+        db.session.query(VideoLike.id, VideoLike.is_like)
+        .filter_by(video_id=video_id, user_id=user.id)
+        .first()
+    )
 
-    if not existing:
-        like_row = VideoLike(
-            video_id=video.id,
-            user_id=user.id,
-            is_like=(action == "like"),
+    # Each branch also maintains the denormalized counters on the video
+    # row in the same transaction.
+    if prev is None:
+        db.session.add(
+            VideoLike(video_id=video_id, user_id=user.id, is_like=is_like)
+        )
+        counter_delta = (
+            {Video.like_count: Video.like_count + 1}
+            if is_like
+            else {Video.dislike_count: Video.dislike_count + 1}
+        )
+    elif prev.is_like == is_like:
+        # Same button pressed again: remove the like/dislike
+        VideoLike.query.filter_by(id=prev.id).delete(synchronize_session=False)
+        counter_delta = (
+            {Video.like_count: Video.like_count - 1}
+            if is_like
+            else {Video.dislike_count: Video.dislike_count - 1}
         )
-        db.session.add(like_row)
     else:
-        # Toggle logic
-        if action == "like":
-            if existing.is_like:
-                db.session.delete(existing)  # remove like
-            else:
-                existing.is_like = True  # change dislike -> like
-        else:  # action == "dislike"
-            if not existing.is_like:
-                db.session.delete(existing)  # remove dislike
-            else:
-                existing.is_like = False  # change like -> dislike
+        # Switch like <-> dislike
+        VideoLike.query.filter_by(id=prev.id).update(
+            {VideoLike.is_like: is_like}, synchronize_session=False
+        )
+        if is_like:
+            counter_delta = {
+                Video.like_count: Video.like_count + 1,
+                Video.dislike_count: Video.dislike_count - 1,
+            }
+        else:
+            counter_delta = {
+                Video.like_count: Video.like_count - 1,
+                Video.dislike_count: Video.dislike_count + 1,
+            }
 
+    Video.query.filter_by(id=video_id).update(
+        counter_delta, synchronize_session=False
+    )
     db.session.commit()
+    _bump_profile_version(user.id)
     return redirect(url_for("main.video_detail", video_id=video_id))
 
 
@@ -312,7 +471,8 @@ def comment_video(video_id):
         )
         return redirect(url_for("main.video_detail", video_id=video_id))
 
-    video = Video.query.get_or_404(video_id)
+    if db.session.query(Video.id).filter_by(id=video_id).scalar() is None:
+        abort(404)
     text = (request.form.get("comment_text") or "").strip()
     anonymous = bool(request.form.get("anonymous"))
     parent_id = request.form.get("parent_comment_id")
@@ -329,18 +489,22 @@ def comment_video(video_id):
             pid_int = None
         if pid_int:
             parent_comment = Comment.query.filter_by(
-                id=pid_int, video_id=video.id
+                id=pid_int, video_id=video_id
             ).first()
 
     comment = Comment(
-        video_id=video.id,
+        video_id=video_id,
         user_id=None if anonymous else user.id,
         text=text,
         anonymous=anonymous,
         parent_comment_id=parent_comment.id if parent_comment else None,
     )
     db.session.add(comment)
+    Video.query.filter_by(id=video_id).update(
+        {Video.comment_count: Video.comment_count + 1}, synchronize_session=False
+    )
     db.session.commit()
+    _bump_profile_version(user.id)
 
     flash("Comment posted.", "success")
     return redirect(url_for("main.video_detail", video_id=video_id))
@@ -355,20 +519,22 @@ def like_comment(comment_id):
             "Your account is banned. You cannot like comments at this time.",
             "danger",
         )
-    comment = Comment.query.get_or_404(comment_id)
-    video_id = comment.video_id
+    # Only the parent video id is needed; skip hydrating the Comment row.
+    video_id = db.session.query(Comment.video_id).filter_by(id=comment_id).scalar()
+    if video_id is None:
+        abort(404)
 
     if user.is_banned:
         return redirect(url_for("main.video_detail", video_id=video_id))
 
     existing = CommentLike.query.filter_by(
-        comment_id=comment.id, user_id=user.id
+        comment_id=comment_id, user_id=user.id
     ).first()
 
     if existing:
         db.session.delete(existing)  # unlike
     else:
-        like_row = CommentLike(comment_id=comment.id, user_id=user.id)
+        like_row = CommentLike(comment_id=comment_id, user_id=user.id)
         db.session.add(like_row)
 
     db.session.commit()
@@ -384,11 +550,17 @@ def heart_comment(comment_id):
         flash("Only admins can heart comments.", "danger")
         return redirect(url_for("main.index"))
 
-    comment = Comment.query.get_or_404(comment_id)
-    comment.admin_hearted = not bool(comment.admin_hearted)
+    video_id = db.session.query(Comment.video_id).filter_by(id=comment_id).scalar()
+    if video_id is None:
+        abort(404)
+
+    # Toggle in SQL; no need to load the row just to flip a flag.
+    Comment.query.filter_by(id=comment_id).update(
+        {Comment.admin_hearted: ~Comment.admin_hearted}, synchronize_session=False
+    )
     db.session.commit()
 
-    return redirect(url_for("main.video_detail", video_id=comment.video_id))
+    return redirect(url_for("main.video_detail", video_id=video_id))
 
 
 @main_bp.route("/stream/<int:video_id>")
@@ -428,7 +600,31 @@ def stream_video(video_id):
         except ValueError:
             quality = None
 
-    return range_request_response(video_path, content_type, quality=quality)
+    # Transcoding requests keep the custom streaming pipeline.
+    if quality is not None:
+        return range_request_response(
+            video_path, content_type, quality=quality, file_size=video.file_size
+        )
+
+    # Behind nginx, hand the raw stream off entirely: auth ran above, the
+    # response carries only headers, and the proxy serves the file (with
+    # Range support) without tying up a Python worker.
+    if current_app.config.get("USE_X_ACCEL"):
+        prefix = current_app.config["X_ACCEL_INTERNAL_PREFIX"].rstrip("/")
+        resp = Response(status=200, mimetype=content_type)
+        # Discovered files keep their original names; percent-encode so
+        # spaces and non-latin1 characters survive both nginx's internal
+        # URI parsing and WSGI's latin-1 header serialization.
+        resp.headers["X-Accel-Redirect"] = f"{prefix}/{quote(video.filename)}"
+        return resp
+
+    # Raw file: send_file(conditional=True) handles Range/If-* headers and
+    # goes through wsgi.file_wrapper, so servers that support sendfile(2)
+    # copy the bytes in-kernel instead of through Python read loops.
+    try:
+        return send_file(video_path, mimetype=content_type, conditional=True)
+    except FileNotFoundError:
+        abort(404)
 
 
 @main_bp.route("/thumbnails/<path:thumb_name>")
@@ -440,6 +636,35 @@ def thumbnail(thumb_name):
 
 # -------- Public user profile with pagination --------
 
+# Public profiles are read far more often than a user likes or comments,
+# so the per-page query results are cached in-process for a short TTL.
+# Writes bump the user's version counter, which changes the cache key and
+# makes stale entries unreachable (they age out via the TTL sweep).
+_PROFILE_TTL = 60.0
+_profile_cache = {}  # key tuple -> (expires_at, data dict)
+_profile_versions = {}  # user_id -> int
+
+
+def _bump_profile_version(user_id):
+    """Invalidate cached profile pages for `user_id` (called on writes)."""
+    _profile_versions[user_id] = _profile_versions.get(user_id, 0) + 1
+
+
+def _profile_cache_get(key):
+    entry = _profile_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _profile_cache_put(key, data):
+    if len(_profile_cache) > 256:
+        now = time.monotonic()
+        for k in [k for k, (exp, _) in _profile_cache.items() if exp <= now]:
+            _profile_cache.pop(k, None)
+    _profile_cache[key] = (time.monotonic() + _PROFILE_TTL, data)
+
+
 @main_bp.route("/user/<int:user_id>")
 def user_profile(user_id):
     """
@@ -467,88 +692,153 @@ def user_profile(user_id):
     liked_per_page = 6
     comments_per_page = 10
 
+    show_liked_to_viewer = is_owner or profile_user.liked_videos_public
+    show_comments_to_viewer = is_owner or profile_user.comments_public
+
+    cache_key = (
+        profile_user.id,
+        _profile_versions.get(profile_user.id, 0),
+        liked_page,
+        comments_page,
+        show_liked_to_viewer,
+        show_comments_to_viewer,
+    )
+    data = _profile_cache_get(cache_key)
+    if data is None:
+        data = _build_profile_page_data(
+            profile_user.id,
+            show_liked_to_viewer,
+            show_comments_to_viewer,
+            liked_page,
+            comments_page,
+            liked_per_page,
+            comments_per_page,
+        )
+        _profile_cache_put(cache_key, data)
+
+    return render_template(
+        "user_profile.html",
+        profile_user=profile_user,
+        is_owner=is_owner,
+        show_liked_to_viewer=show_liked_to_viewer,
+        show_comments_to_viewer=show_comments_to_viewer,
+        liked_per_page=liked_per_page,
+        comments_per_page=comments_per_page,
+        **data,
+    )
+
+
+def _build_profile_page_data(
+    user_id,
+    show_liked,
+    show_comments,
+    liked_page,
+    comments_page,
+    liked_per_page,
+    comments_per_page,
+):
+    """
+    Compute one page of profile data as plain snapshot objects.
+
+    Returns namespaces rather than ORM rows so the result can live in the
+    process-wide cache beyond the session that produced it.
+    """
     # ----- Liked videos -----
     liked_videos = []
     liked_total = 0
     liked_total_pages = 1
-    show_liked_to_viewer = is_owner or profile_user.liked_videos_public
 
-    if show_liked_to_viewer:
-        like_q = VideoLike.query.filter_by(user_id=profile_user.id, is_like=True)
-        liked_total = like_q.count()
-        if liked_total > 0:
-            liked_total_pages = (liked_total + liked_per_page - 1) // liked_per_page
-        else:
-            liked_total_pages = 1
+    if show_liked:
+        like_filter = (
+            VideoLike.user_id == user_id,
+            VideoLike.is_like.is_(True),
+        )
+        liked_total = (
+            db.session.query(db.func.count(VideoLike.id)).filter(*like_filter).scalar()
+        )
+        liked_total_pages = max(1, (liked_total + liked_per_page - 1) // liked_per_page)
 
         if liked_page < 1:
             liked_page = 1
         if liked_page > liked_total_pages:
             liked_page = liked_total_pages
 
-        like_entries = (
-            like_q.order_by(VideoLike.created_at.desc())
+        rows = (
+            db.session.query(
+                Video.id, Video.title, Video.thumbnail_filename, Video.view_count
+            )
+            .join(VideoLike, VideoLike.video_id == Video.id)
+            .filter(*like_filter)
+            .order_by(VideoLike.created_at.desc())
             .limit(liked_per_page)
             .offset((liked_page - 1) * liked_per_page)
             .all()
         )
-        video_ids = [l.video_id for l in like_entries]
-        if video_ids:
-            videos_by_id = {
-                v.id: v for v in Video.query.filter(Video.id.in_(video_ids)).all()
-            }
-            liked_videos = [videos_by_id[vid] for vid in video_ids if vid in videos_by_id]
+        liked_videos = [
+            SimpleNamespace(
+                id=vid, title=title, thumbnail_filename=thumb, view_count=views
+            )
+            for vid, title, thumb, views in rows
+        ]
     else:
         liked_page = 1
-        liked_total_pages = 1
-        liked_total = 0
 
     # ----- Comments -----
     user_comments = []
     comments_total = 0
     comments_total_pages = 1
-    show_comments_to_viewer = is_owner or profile_user.comments_public
 
-    if show_comments_to_viewer:
-        comments_q = Comment.query.filter_by(user_id=profile_user.id, anonymous=False)
-        comments_total = comments_q.count()
-        if comments_total > 0:
-            comments_total_pages = (comments_total + comments_per_page - 1) // comments_per_page
-        else:
-            comments_total_pages = 1
+    if show_comments:
+        comment_filter = (
+            Comment.user_id == user_id,
+            Comment.anonymous.is_(False),
+        )
+        comments_total = (
+            db.session.query(db.func.count(Comment.id)).filter(*comment_filter).scalar()
+        )
+        comments_total_pages = max(
+            1, (comments_total + comments_per_page - 1) // comments_per_page
+        )
 
         if comments_page < 1:
             comments_page = 1
         if comments_page > comments_total_pages:
             comments_page = comments_total_pages
 
-        user_comments = (
-            comments_q.order_by(Comment.created_at.desc())
+        # Join the video title in directly instead of letting the template
+        # lazy-load `c.video` per comment.
+        rows = (
+            db.session.query(
+                Comment.text, Comment.created_at, Comment.video_id, Video.title
+            )
+            .outerjoin(Video, Video.id == Comment.video_id)
+            .filter(*comment_filter)
+            .order_by(Comment.created_at.desc())
             .limit(comments_per_page)
             .offset((comments_page - 1) * comments_per_page)
             .all()
         )
+        user_comments = [
+            SimpleNamespace(
+                text=text,
+                created_at=created_at,
+                video_id=video_id,
+                video=SimpleNamespace(title=video_title)
+                if video_title is not None
+                else None,
+            )
+            for text, created_at, video_id, video_title in rows
+        ]
     else:
         comments_page = 1
-        comments_total_pages = 1
-        comments_total = 0
 
-    return render_template(
-        "user_profile.html",
-        profile_user=profile_user,
-        is_owner=is_owner,
-        # liked videos
-        show_liked_to_viewer=show_liked_to_viewer,
-        liked_videos=liked_videos,
-        liked_page=liked_page,
-        liked_total_pages=liked_total_pages,
-        liked_total=liked_total,
-        liked_per_page=liked_per_page,
-        # comments
-        show_comments_to_viewer=show_comments_to_viewer,
-        user_comments=user_comments,
-        comments_page=comments_page,
-        comments_total_pages=comments_total_pages,
-        comments_total=comments_total,
-        comments_per_page=comments_per_page,
-    )
+    return {
+        "liked_videos": liked_videos,
+        "liked_page": liked_page,
+        "liked_total_pages": liked_total_pages,
+        "liked_total": liked_total,
+        "user_comments": user_comments,
+        "comments_page": comments_page,
+        "comments_total_pages": comments_total_pages,
+        "comments_total": comments_total,
+    }
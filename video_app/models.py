@@ -1,10 +1,32 @@
+import time
 from datetime import datetime
 
-from flask import current_app
+from flask import current_app, g
+from sqlalchemy.orm import load_only
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from . import db
 
+# Default DeepSeek prompts, built once at import time. Seeded into the
+# AppConfig row and used as fallbacks wherever the stored prompt is
+# empty (admin.py imports these).
+DEFAULT_DEEPSEEK_SYSTEM_PROMPT = (
+    "You are an assistant that writes concise, engaging video "
+    "titles and descriptions for a video website."
+)
+
+DEFAULT_DEEPSEEK_USER_PROMPT_TEMPLATE = (
+    "You help write YouTube-style video titles and descriptions.\n\n"
+    "Given this video file name: \"{filename}\",\n"
+    "1. Generate a short, catchy title (max 80 characters).\n"
+    "2. Generate a 2–3 sentence description.\n\n"
+    "Respond ONLY as JSON like:\n"
+    "{\n"
+    '  \"title\": \"...\",\n'
+    '  \"description\": \"...\"\n'
+    "}\n"
+)
+
 
 class AppConfig(db.Model):
     """
@@ -28,8 +50,68 @@ class AppConfig(db.Model):
     site_name = db.Column(db.String(255), nullable=True)
     footer_text = db.Column(db.String(255), nullable=True)
 
-    # Video transcoding backend: cpu / intel / amd / nvidia
-    transcoding_backend = db.Column(db.String(32), nullable=True)
+    # Video transcoding backend. Native enum with a CHECK constraint,
+    # so the database rejects anything outside the known set.
+    transcoding_backend = db.Column(
+        db.Enum("cpu", "intel", "amd", "nvidia", name="transcoding_backend"),
+        default="cpu",
+        nullable=False,
+    )
+
+
+def get_app_config():
+    """
+    Return the AppConfig singleton row, cached on `flask.g` for the
+    duration of the request so repeated callers (context processor,
+    views, helpers) share a single SELECT.
+    """
+    cfg = g.get("_app_config")
+    if cfg is None:
+        cfg = AppConfig.query.first()
+        g._app_config = cfg
+    return cfg
+
+
+# Process-wide cache for the few AppConfig values every template needs.
+# Refreshed after _BRANDING_TTL seconds, or immediately when the admin
+# settings form saves (invalidate_branding_cache).
+_BRANDING_TTL = 30.0
+_branding_cache = None  # (expires_at, values dict)
+
+
+def get_branding():
+    """
+    Return the template globals derived from AppConfig (registration
+    flag, site name, footer text), cached process-wide with a short TTL
+    so rendering a page doesn't normally hit the database at all.
+    """
+    global _branding_cache
+
+    now = time.monotonic()
+    cached = _branding_cache
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    cfg = AppConfig.query.options(
+        load_only(
+            AppConfig.registration_enabled,
+            AppConfig.site_name,
+            AppConfig.footer_text,
+        )
+    ).first()
+    values = {
+        "registration_enabled": cfg.registration_enabled if cfg else True,
+        "site_name": (cfg.site_name if cfg and cfg.site_name else "MyTube"),
+        "footer_text": (cfg.footer_text if cfg and cfg.footer_text else "© MyTube"),
+    }
+    _branding_cache = (now + _BRANDING_TTL, values)
+    return values
+
+
+def invalidate_branding_cache():
+    """Drop the cached branding values (called after settings saves)."""
+    global _branding_cache
+    _branding_cache = None
 
 
 class User(db.Model):
@@ -44,7 +126,7 @@ class User(db.Model):
 
     # Optional public-facing profile fields
     username = db.Column(db.String(64), nullable=True)
-    gender = db.Column(db.String(32), nullable=True)
+    gender = db.Column(db.String(16), nullable=True)
     about_me = db.Column(db.Text, nullable=True)
 
     # Privacy settings for public profile
@@ -58,37 +140,43 @@ class User(db.Model):
     # Relationships (cascade deletes to avoid orphan rows / integrity errors)
     videos = db.relationship(
         "Video",
-        backref="uploader",
+        back_populates="uploader",
         lazy=True,
         cascade="all, delete-orphan",
     )
     watch_history = db.relationship(
         "WatchHistory",
-        backref="user",
+        back_populates="user",
         lazy=True,
         cascade="all, delete-orphan",
     )
     video_likes = db.relationship(
         "VideoLike",
-        backref="user",
+        back_populates="user",
         lazy=True,
         cascade="all, delete-orphan",
     )
     comments = db.relationship(
         "Comment",
-        backref="user",
+        back_populates="user",
         lazy=True,
         cascade="all, delete-orphan",
     )
     comment_likes = db.relationship(
         "CommentLike",
-        backref="user",
+        back_populates="user",
         lazy=True,
         cascade="all, delete-orphan",
     )
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        # Pin the hash instead of relying on werkzeug's default, which
+        # has changed between releases. 600k pbkdf2-sha256 iterations is
+        # the current OWASP figure; hashlib dispatches the inner loop to
+        # OpenSSL, which uses the CPU's SHA extensions where available.
+        self.password_hash = generate_password_hash(
+            password, method="pbkdf2:sha256:600000"
+        )
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
@@ -106,9 +194,21 @@ class Video(db.Model):
     description = db.Column(db.Text, nullable=True)
 
     filename = db.Column(db.String(512), nullable=False)
-    content_type = db.Column(db.String(128), default="video/mp4", nullable=False)
+    content_type = db.Column(db.String(64), default="video/mp4", nullable=False)
+
+    # Size in bytes, recorded when the file is registered, so streaming
+    # doesn't have to stat() the file on every request. Nullable for
+    # rows that predate the column; those fall back to os.path.getsize.
+    file_size = db.Column(db.BigInteger, nullable=True)
+
+    # Probed once (ffprobe) when the thumbnail worker first sees the
+    # file; videos don't change length, so later callers skip the probe.
+    duration_seconds = db.Column(db.Float, nullable=True)
 
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Indexed: the home feed and Up-next sidebar always order by recency
+    uploaded_at = db.Column(
+        db.DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
     uploader_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
     # Optional thumbnail
@@ -117,24 +217,42 @@ class Video(db.Model):
     # View count
     view_count = db.Column(db.Integer, default=0, nullable=False)
 
+    # Denormalized counters, maintained inline by the like/comment
+    # endpoints so pages and sorts read a column instead of running
+    # COUNT(*) against the child tables.
+    like_count = db.Column(db.Integer, default=0, nullable=False, index=True)
+    dislike_count = db.Column(db.Integer, default=0, nullable=False, index=True)
+    comment_count = db.Column(db.Integer, default=0, nullable=False, index=True)
+
     # Relationships
+    uploader = db.relationship("User", back_populates="videos")
     watch_entries = db.relationship(
         "WatchHistory",
-        backref="video",
+        back_populates="video",
         lazy=True,
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     likes = db.relationship(
         "VideoLike",
-        backref="video",
+        back_populates="video",
         lazy=True,
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     comments = db.relationship(
         "Comment",
-        backref="video",
+        back_populates="video",
         lazy=True,
         cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        # Serves the case-insensitive title sorts on the index page. A
+        # substring search (%q% ILIKE) still scans; on PostgreSQL a
+        # pg_trgm GIN index on title/description would cover that too.
+        db.Index("ix_videos_title_lower", db.func.lower(title)),
     )
 
     def __repr__(self) -> str:
@@ -149,13 +267,23 @@ class WatchHistory(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), nullable=False)
+    video_id = db.Column(
+        db.Integer,
+        db.ForeignKey("videos.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
 
     # Last time the user watched this video
     last_watched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    user = db.relationship("User", back_populates="watch_history")
+    video = db.relationship("Video", back_populates="watch_entries")
+
     __table_args__ = (
         db.UniqueConstraint("user_id", "video_id", name="uq_watch_history_user_video"),
+        # History tab: filter by user, order by recency
+        db.Index("ix_watchhistory_user_watched", "user_id", "last_watched_at"),
     )
 
     def __repr__(self) -> str:
@@ -172,15 +300,25 @@ class VideoLike(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), nullable=False)
+    video_id = db.Column(
+        db.Integer,
+        db.ForeignKey("videos.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
 
     # True = like, False = dislike
     is_like = db.Column(db.Boolean, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    user = db.relationship("User", back_populates="video_likes")
+    video = db.relationship("Video", back_populates="likes")
+
     __table_args__ = (
         db.UniqueConstraint("user_id", "video_id", name="uq_user_video_like"),
+        # Liked tab: filter by user + is_like, order by recency
+        db.Index("ix_videolike_user_like_created", "user_id", "is_like", "created_at"),
     )
 
     def __repr__(self) -> str:
@@ -192,8 +330,12 @@ class Comment(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    video_id = db.Column(
+        db.Integer, db.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id"), nullable=True, index=True
+    )
 
     # If True, the comment is shown as anonymous (user id may be null)
     anonymous = db.Column(db.Boolean, default=False, nullable=False)
@@ -202,17 +344,38 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Self-referential relationship for replies
-    parent_comment_id = db.Column(db.Integer, db.ForeignKey("comments.id"), nullable=True)
+    parent_comment_id = db.Column(
+        db.Integer,
+        db.ForeignKey("comments.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    # Authors are batch-loaded wherever comments are queried; the video
+    # page renders one per comment.
+    user = db.relationship("User", back_populates="comments", lazy="selectin")
+    video = db.relationship("Video", back_populates="comments")
+    parent = db.relationship("Comment", back_populates="replies", remote_side=[id])
     replies = db.relationship(
         "Comment",
-        backref=db.backref("parent", remote_side=[id]),
+        back_populates="parent",
         lazy=True,
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     # Whether an admin has "hearted" this comment
     admin_hearted = db.Column(db.Boolean, default=False, nullable=False)
 
+    __table_args__ = (
+        # Video pages: top-level comments per video, ordered by recency
+        db.Index(
+            "ix_comment_video_parent_created",
+            "video_id",
+            "parent_comment_id",
+            "created_at",
+        ),
+    )
+
     def __repr__(self) -> str:
         return f"<Comment {self.id} video={self.video_id}>"
 
@@ -227,10 +390,17 @@ class CommentLike(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    comment_id = db.Column(db.Integer, db.ForeignKey("comments.id"), nullable=False)
+    comment_id = db.Column(
+        db.Integer,
+        db.ForeignKey("comments.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    user = db.relationship("User", back_populates="comment_likes")
+
     __table_args__ = (
         db.UniqueConstraint("user_id", "comment_id", name="uq_user_comment_like"),
     )
@@ -244,39 +414,34 @@ def init_default_admin_and_config():
     Helper to initialize a default admin user and config row
     if they don't exist yet. Call this from app factory / CLI.
     """
-    # Config row
-    cfg = AppConfig.query.first()
-    if cfg is None:
+    # EXISTS probes: neither row needs hydrating (or counting) just to
+    # learn whether it is there.
+    has_cfg = db.session.query(db.session.query(AppConfig.id).exists()).scalar()
+    has_admin = db.session.query(
+        db.session.query(User.id).filter_by(is_admin=True).exists()
+    ).scalar()
+
+    if has_cfg and has_admin:
+        return
+
+    if not has_cfg:
         cfg = AppConfig(
             registration_enabled=current_app.config.get(
                 "REGISTRATION_ENABLED_DEFAULT", True
             ),
             deepseek_api_key=None,
-            deepseek_system_prompt=(
-                "You are an assistant that writes concise, engaging video "
-                "titles and descriptions for a video website."
-            ),
-            deepseek_user_prompt_template=(
-                "You help write YouTube-style video titles and descriptions.\n\n"
-                "Given this video file name: \"{filename}\",\n"
-                "1. Generate a short, catchy title (max 80 characters).\n"
-                "2. Generate a 2–3 sentence description.\n\n"
-                "Respond ONLY as JSON like:\n"
-                "{\n"
-                '  \"title\": \"...\",\n'
-                '  \"description\": \"...\"\n'
-                "}\n"
-            ),
+            deepseek_system_prompt=DEFAULT_DEEPSEEK_SYSTEM_PROMPT,
+            deepseek_user_prompt_template=DEFAULT_DEEPSEEK_USER_PROMPT_TEMPLATE,
             site_name="MyTube",
             footer_text="© MyTube",
             transcoding_backend="cpu",
         )
         db.session.add(cfg)
 
-    # Default admin
-    if User.query.filter_by(is_admin=True).count() == 0:
+    if not has_admin:
         admin = User(email="admin@example.com", is_admin=True)
         admin.set_password("admin123")
         db.session.add(admin)
 
+    # Both inserts (when needed) land in one transaction.
     db.session.commit()
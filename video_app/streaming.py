@@ -1,30 +1,83 @@
 import os
+import re
+import shutil
 import subprocess
+import threading
 import uuid
+from functools import lru_cache
 from typing import Optional
 
 from flask import Response, request, abort, current_app
+from werkzeug.wsgi import wrap_file
+
+# Fallback chunk size when the WSGI server iterates in Python; large
+# enough to amortize syscall and interpreter overhead per chunk.
+_STREAM_CHUNK = 256 * 1024
+
+
+class _FileRangeWrapper:
+    """
+    File-like view over a byte range of a file, suitable for
+    wsgi.file_wrapper (servers with sendfile(2) support copy the bytes
+    in-kernel) with plain iteration as the fallback.
+    """
+
+    def __init__(self, path: str, start: int, length: int):
+        self._f = open(path, "rb")
+        if start:
+            self._f.seek(start)
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        data = self.read(_STREAM_CHUNK)
+        if not data:
+            raise StopIteration
+        return data
+
+
+_MIME_BY_EXT = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".mkv": "video/x-matroska",
+    ".avi": "video/x-msvideo",
+    ".mov": "video/quicktime",
+}
 
 
 def guess_mime_type(filename):
-    fn = filename.lower()
-    if fn.endswith(".mp4"):
-        return "video/mp4"
-    if fn.endswith(".webm"):
-        return "video/webm"
-    if fn.endswith(".mkv"):
-        return "video/x-matroska"
-    if fn.endswith(".avi"):
-        return "video/x-msvideo"
-    if fn.endswith(".mov"):
-        return "video/quicktime"
-    return "application/octet-stream"
+    ext = os.path.splitext(filename)[1].lower()
+    return _MIME_BY_EXT.get(ext, "application/octet-stream")
 
 
 # ------------------ Range-based original streaming ------------------
 
+# Single-form range spec (`bytes=start-end`, either side optional):
+# validates and extracts in one pass instead of two splits plus
+# per-field int() error handling.
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
 
-def range_request_response(video_path: str, content_type: str = None, quality: Optional[int] = None):
+
+def range_request_response(
+    video_path: str,
+    content_type: str = None,
+    quality: Optional[int] = None,
+    file_size: Optional[int] = None,
+):
     """
     Stream a video file.
 
@@ -34,36 +87,41 @@ def range_request_response(video_path: str, content_type: str = None, quality: O
       attempts real-time transcoding down to <= that height (never upscales)
       and streams an MP4. In transcoding mode, Range headers are ignored
       and we return a regular 200 response with chunked output.
-    """
-    if not os.path.exists(video_path):
-        abort(404)
 
-    # If a valid quality is requested and ffmpeg is present, use real-time transcoding.
-    if quality in (1080, 720, 480) and _ffmpeg_available():
-        return _transcoded_stream_response(video_path, target_height=quality)
+    When `file_size` is passed (from Video.file_size, recorded at upload)
+    the size on disk is trusted and the exists/getsize stat calls are
+    skipped entirely.
+    """
+    if quality in (1080, 720, 480):
+        # Serve a pre-encoded rung when one exists: a plain seekable MP4
+        # with full Range support, no per-viewer encode.
+        rendition = _rendition_path(video_path, quality)
+        if os.path.exists(rendition):
+            return range_request_response(rendition, "video/mp4")
+
+        # Otherwise fall back to real-time transcoding when ffmpeg is present.
+        if _ffmpeg_available():
+            if file_size is None and not os.path.exists(video_path):
+                abort(404)
+            return _transcoded_stream_response(video_path, target_height=quality)
 
     # Fallback: original range-based streaming from disk.
-    file_size = os.path.getsize(video_path)
+    if file_size is None:
+        if not os.path.exists(video_path):
+            abort(404)
+        file_size = os.path.getsize(video_path)
     range_header = request.headers.get("Range", None)
 
     if not content_type:
         content_type = guess_mime_type(video_path)
 
     if range_header:
-        try:
-            bytes_unit, range_spec = range_header.split("=")
-        except ValueError:
+        m = _RANGE_RE.match(range_header)
+        if m is None or m.group(1) == m.group(2) == "":
             abort(416)
 
-        if bytes_unit != "bytes":
-            abort(416)
-
-        start_str, end_str = range_spec.split("-")
-        try:
-            start = int(start_str) if start_str else 0
-            end = int(end_str) if end_str else file_size - 1
-        except ValueError:
-            abort(416)
+        start = int(m.group(1) or 0)
+        end = int(m.group(2) or file_size - 1)
 
         if start >= file_size:
             abort(416)
@@ -71,20 +129,13 @@ def range_request_response(video_path: str, content_type: str = None, quality: O
         end = min(end, file_size - 1)
         length = end - start + 1
 
-        def generate():
-            with open(video_path, "rb") as f:
-                f.seek(start)
-                remaining = length
-                chunk_size = 8192
-                while remaining > 0:
-                    chunk = f.read(min(chunk_size, remaining))
-                    if not chunk:
-                        break
-                    remaining -= len(chunk)
-                    yield chunk
-
+        try:
+            source = _FileRangeWrapper(video_path, start, length)
+        except FileNotFoundError:
+            abort(404)
+        body = wrap_file(request.environ, source, buffer_size=_STREAM_CHUNK)
         rv = Response(
-            generate(),
+            body,
             status=206,
             mimetype=content_type,
             direct_passthrough=True,
@@ -94,16 +145,13 @@ def range_request_response(video_path: str, content_type: str = None, quality: O
         rv.headers.add("Content-Length", str(length))
         return rv
 
-    def generate_full():
-        with open(video_path, "rb") as f:
-            while True:
-                data = f.read(8192)
-                if not data:
-                    break
-                yield data
-
+    try:
+        source = open(video_path, "rb")
+    except FileNotFoundError:
+        abort(404)
+    body = wrap_file(request.environ, source, buffer_size=_STREAM_CHUNK)
     rv = Response(
-        generate_full(),
+        body,
         status=200,
         mimetype=content_type,
         direct_passthrough=True,
@@ -116,33 +164,31 @@ def range_request_response(video_path: str, content_type: str = None, quality: O
 # ------------------ Thumbnail helpers ------------------
 
 
+# Resolved once per process: spawning `ffmpeg -version` per request just
+# to test for existence was a fork+exec on the hot streaming path. The
+# resolved absolute paths are also reused in the command lists so execvp
+# skips the PATH walk.
+
+
+@lru_cache(maxsize=1)
+def _ffmpeg_path() -> Optional[str]:
+    return shutil.which("ffmpeg")
+
+
+@lru_cache(maxsize=1)
+def _ffprobe_path() -> Optional[str]:
+    return shutil.which("ffprobe")
+
+
 def _ffmpeg_available() -> bool:
-    try:
-        subprocess.run(
-            ["ffmpeg", "-version"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
-        return True
-    except OSError:
-        return False
+    return _ffmpeg_path() is not None
 
 
 def _ffprobe_available() -> bool:
-    try:
-        subprocess.run(
-            ["ffprobe", "-version"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
-        return True
-    except OSError:
-        return False
+    return _ffprobe_path() is not None
 
 
-def _get_video_duration(video_path: str) -> Optional[float]:
+def get_video_duration(video_path: str) -> Optional[float]:
     """
     Return video duration in seconds using ffprobe, or None if not available/fails.
     """
@@ -150,7 +196,7 @@ def _get_video_duration(video_path: str) -> Optional[float]:
         return None
 
     cmd = [
-        "ffprobe",
+        _ffprobe_path(),
         "-v",
         "error",
         "-show_entries",
@@ -177,11 +223,14 @@ def _get_video_duration(video_path: str) -> Optional[float]:
         return None
 
 
-def generate_video_thumbnail(video_path: str) -> Optional[str]:
+def generate_video_thumbnail(
+    video_path: str, duration: Optional[float] = None
+) -> Optional[str]:
     """
     Generate a JPEG thumbnail for the given video.
 
-    - Uses ffprobe to get duration.
+    - Uses ffprobe to get duration, unless the caller already knows it
+      (e.g. from Video.duration_seconds) and passes it in.
     - Captures a frame at 25% of the video duration (with a minimum of 1s).
     - Scales the frame to ~720p width (1280px) while preserving aspect ratio.
       (For a 16:9 video this will be 1280x720.)
@@ -191,8 +240,8 @@ def generate_video_thumbnail(video_path: str) -> Optional[str]:
     if not os.path.exists(video_path):
         return None
 
-    thumb_dir = current_app.config["THUMBNAIL_DIR"]
-    os.makedirs(thumb_dir, exist_ok=True)
+    # Created once at app startup; no need to re-makedirs per call.
+    thumb_dir = current_app.config["THUMBNAIL_DIR_P"]
 
     thumb_name = f"{uuid.uuid4().hex}.jpg"
     thumb_path = os.path.join(thumb_dir, thumb_name)
@@ -201,7 +250,8 @@ def generate_video_thumbnail(video_path: str) -> Optional[str]:
         return None
 
     # Determine capture time: 25% into the video, min 1 second
-    duration = _get_video_duration(video_path)
+    if duration is None:
+        duration = get_video_duration(video_path)
     if duration and duration > 0:
         target_time = max(1.0, duration * 0.25)
     else:
@@ -213,20 +263,31 @@ def generate_video_thumbnail(video_path: str) -> Optional[str]:
     seconds = target_time % 60
     time_str = f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
 
-    # Scale to 1280px width (for 16:9 this is 1280x720 ~ 720p)
+    # Scale to 1280px width (for 16:9 this is 1280x720 ~ 720p).
+    # -noaccurate_seek + -skip_frame nokey: jump to the nearest keyframe
+    # and decode only that one I-frame instead of grinding through a GOP
+    # of non-key frames; -vsync vfr keeps the skipped frames from
+    # producing duplicates. One frame doesn't benefit from threading.
     cmd = [
-        "ffmpeg",
+        _ffmpeg_path(),
         "-y",
+        "-noaccurate_seek",
         "-ss",
         time_str,
+        "-skip_frame",
+        "nokey",
         "-i",
         video_path,
+        "-vsync",
+        "vfr",
         "-vframes",
         "1",
         "-vf",
         "scale=1280:-1",
         "-q:v",
         "5",
+        "-threads",
+        "1",
         thumb_path,
     ]
 
@@ -248,57 +309,178 @@ def generate_video_thumbnail(video_path: str) -> Optional[str]:
     return thumb_name
 
 
+# ------------------ Pre-generated renditions ------------------
+
+
+_RENDITION_HEIGHTS = (1080, 720, 480)
+
+
+def _rendition_path(video_path: str, height: int) -> str:
+    """
+    Where the pre-encoded rung for `video_path` at `height` lives:
+    a sibling `.renditions/` directory keyed by the source file's stem.
+    """
+    parent, name = os.path.split(video_path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(parent, ".renditions", f"{stem}_{height}p.mp4")
+
+
+def generate_renditions(video_path: str) -> None:
+    """
+    Pre-encode the quality ladder for a video.
+
+    No-op unless PREGENERATE_RENDITIONS is enabled and ffmpeg is
+    available. Meant to run on a background worker (the upload handlers
+    submit it to the thumbnail pool); each rung is encoded to a temp
+    file and renamed into place so readers never see a partial file.
+    Rungs that already exist are skipped, so re-running is cheap.
+    """
+    if not current_app.config.get("PREGENERATE_RENDITIONS"):
+        return
+    if not _ffmpeg_available() or not os.path.exists(video_path):
+        return
+
+    backend = _get_transcoding_backend()
+    rend_dir = os.path.dirname(_rendition_path(video_path, _RENDITION_HEIGHTS[0]))
+    os.makedirs(rend_dir, exist_ok=True)
+
+    for height in _RENDITION_HEIGHTS:
+        out_path = _rendition_path(video_path, height)
+        if os.path.exists(out_path):
+            continue
+
+        # Same command as the live path, but writing a seekable MP4 to
+        # disk (+faststart moves the moov atom up for instant playback)
+        # instead of a fragmented stream to stdout.
+        cmd = _build_ffmpeg_transcode_cmd(video_path, height, backend)
+        tmp_path = f"{out_path}.part"
+        cmd = cmd[:-5] + ["-movflags", "+faststart", "-f", "mp4", "-y", tmp_path]
+
+        try:
+            subprocess.run(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+            os.replace(tmp_path, out_path)
+        except (subprocess.CalledProcessError, OSError):
+            current_app.logger.warning(
+                "Rendition encode failed for %s at %sp", video_path, height
+            )
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def remove_renditions(video_path: str) -> None:
+    """Delete any pre-encoded rungs for a video (called on video delete)."""
+    for height in _RENDITION_HEIGHTS:
+        try:
+            os.remove(_rendition_path(video_path, height))
+        except OSError:
+            pass
+
+
 # ------------------ Real-time transcoding helpers ------------------
 
 
+def _get_transcode_semaphore() -> threading.BoundedSemaphore:
+    """
+    Cap on simultaneous live transcodes, shared per app (stored on
+    app.extensions like the other lazy singletons). Unbounded ffmpeg
+    fan-out thrashes the encoder — each process wants several cores —
+    and one popular video can starve the whole box.
+    """
+    sem = current_app.extensions.get("transcode_semaphore")
+    if sem is None:
+        limit = int(current_app.config.get("MAX_CONCURRENT_TRANSCODES", 4))
+        sem = threading.BoundedSemaphore(limit)
+        current_app.extensions["transcode_semaphore"] = sem
+    return sem
+
+
 def _get_transcoding_backend() -> str:
     """
     Read the configured transcoding backend from AppConfig.
 
     Returns one of: "cpu", "intel", "amd", "nvidia".
     Defaults to "cpu" if unset or invalid.
+
+    The value is cached on app.extensions so a stream start doesn't pay a
+    SQL round-trip; the admin settings save evicts the cached value.
     """
+    backend = current_app.extensions.get("transcoding_backend")
+    if backend is not None:
+        return backend
+
     try:
         from .models import AppConfig  # local import to avoid circulars
         cfg = AppConfig.query.first()
-        backend = (cfg.transcoding_backend if cfg and cfg.transcoding_backend else "cpu").lower()
+        # Native enum column: only the four known values can come back,
+        # so no re-validation is needed here.
+        backend = cfg.transcoding_backend if cfg and cfg.transcoding_backend else "cpu"
     except Exception:
         backend = "cpu"
 
-    if backend not in ("cpu", "intel", "amd", "nvidia"):
-        backend = "cpu"
+    current_app.extensions["transcoding_backend"] = backend
     return backend
 
 
-def _build_ffmpeg_transcode_cmd(video_path: str, target_height: int, backend: str):
+def _client_supports_hevc(accept_header: str) -> bool:
+    """
+    Whether the client's Accept header advertises HEVC-in-MP4 support
+    (e.g. `video/mp4; codecs=hvc1` from capable players). Browsers that
+    omit codec hints get H.264, which everything can decode.
     """
-    Build an ffmpeg command to transcode `video_path` to MP4 with H.264 video + AAC audio.
+    if not accept_header:
+        return False
+    accept = accept_header.lower()
+    return "hvc1" in accept or "hev1" in accept or "hevc" in accept
+
+
+def _build_ffmpeg_transcode_cmd(
+    video_path: str, target_height: int, backend: str, use_hevc: bool = False
+):
+    """
+    Build an ffmpeg command to transcode `video_path` to MP4 with AAC audio.
 
     - target_height is one of 1080/720/480.
     - We never upscale: use scale=-2:min(ih,target_height) so output height is
       at most both the input height and target_height.
+    - Video codec is H.264 by default; on hardware backends, pass
+      use_hevc=True (client opted in via Accept header) to encode HEVC
+      instead — roughly 40% fewer bits at the same visual quality. CPU
+      stays on libx264: software HEVC is too slow for real-time here.
     """
     # Base scale filter: keep aspect ratio, width divisible by 2, height <= min(ih, target_height)
     scale_filter = f"scale=-2:min(ih,{int(target_height)})"
 
-    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    cmd = [_ffmpeg_path() or "ffmpeg", "-hide_banner", "-loglevel", "error"]
 
     vcodec = "libx264"  # CPU default
     hwaccel_args = []
+    rate_args = []
 
     if backend == "nvidia":
         # NVIDIA NVENC
-        vcodec = "h264_nvenc"
+        vcodec = "hevc_nvenc" if use_hevc else "h264_nvenc"
         hwaccel_args = ["-hwaccel", "cuda"]
+        # Quality-targeted VBR instead of NVENC's constant-QP default.
+        rate_args = ["-rc", "vbr", "-cq", "23"]
     elif backend == "intel":
         # Intel Quick Sync
-        vcodec = "h264_qsv"
+        vcodec = "hevc_qsv" if use_hevc else "h264_qsv"
         hwaccel_args = ["-hwaccel", "qsv"]
     elif backend == "amd":
         # Generic AMD path via VAAPI; may need server-specific tweaking
-        vcodec = "h264_vaapi"
+        vcodec = "hevc_vaapi" if use_hevc else "h264_vaapi"
         hwaccel_args = ["-hwaccel", "vaapi"]
 
+    # hvc1 tag: Safari refuses HEVC tracks tagged hev1.
+    tag_args = ["-tag:v", "hvc1"] if vcodec.startswith("hevc") else []
+
     # Assemble command
     cmd += hwaccel_args
     cmd += [
@@ -310,6 +492,10 @@ def _build_ffmpeg_transcode_cmd(video_path: str, target_height: int, backend: st
         vcodec,
         "-preset",
         "fast",
+    ]
+    cmd += rate_args
+    cmd += tag_args
+    cmd += [
         "-c:a",
         "aac",
         "-b:a",
@@ -333,8 +519,21 @@ def _transcoded_stream_response(video_path: str, target_height: int):
     - Never upscales above source resolution.
     - If hardware encoding fails to start, falls back to CPU libx264.
     """
+    # Degrade gracefully when all encode slots are busy: the viewer gets
+    # the original file (still watchable) rather than queueing behind an
+    # unbounded pile of ffmpeg processes.
+    sem = _get_transcode_semaphore()
+    if not sem.acquire(blocking=False):
+        current_app.logger.warning(
+            "Transcode slots exhausted; serving original for %s", video_path
+        )
+        return range_request_response(video_path, guess_mime_type(video_path))
+
     backend = _get_transcoding_backend()
-    cmd = _build_ffmpeg_transcode_cmd(video_path, target_height, backend)
+    use_hevc = backend != "cpu" and _client_supports_hevc(
+        request.headers.get("Accept", "")
+    )
+    cmd = _build_ffmpeg_transcode_cmd(video_path, target_height, backend, use_hevc)
 
     def start_process(cmd_list):
         try:
@@ -357,13 +556,16 @@ def _transcoded_stream_response(video_path: str, target_height: int):
 
     if not proc:
         # Last resort: just fall back to original range-based streaming
+        sem.release()
         current_app.logger.error("Failed to start ffmpeg for transcoding; falling back to raw file stream.")
         return range_request_response(video_path, guess_mime_type(video_path), quality=None)
 
     def generate():
+        # 64 KiB reads: 8x fewer syscalls and generator round-trips per
+        # MB of output than the previous 8 KiB loop.
         try:
             while True:
-                chunk = proc.stdout.read(8192)
+                chunk = proc.stdout.read(65536)
                 if not chunk:
                     break
                 yield chunk
@@ -373,10 +575,18 @@ def _transcoded_stream_response(video_path: str, target_height: int):
                     proc.stdout.close()
             except Exception:
                 pass
+            # Ask ffmpeg to exit and reap it; only escalate to SIGKILL
+            # if it ignores the request, so we don't leave zombies or
+            # half-flushed hwaccel contexts behind.
             try:
-                proc.kill()
+                proc.terminate()
+                proc.wait(timeout=1)
             except Exception:
-                pass
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+            sem.release()
 
     rv = Response(
         generate(),
@@ -1,9 +1,13 @@
+import errno
+import json
 import os
+import queue
 import shutil
 import time
 import threading
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import Optional, List, Dict, TYPE_CHECKING
 
 try:
@@ -17,6 +21,75 @@ if TYPE_CHECKING:
     from .torrent_downloader import TorrentManager  # type: ignore  # forward ref
 
 
+def _iso_utc(ns: int) -> str:
+    """Format an epoch-nanosecond timestamp as ISO-8601 UTC with a Z suffix."""
+    return (
+        datetime.fromtimestamp(ns / 1e9, tz=timezone.utc)
+        .isoformat(timespec="seconds")
+        .replace("+00:00", "Z")
+    )
+
+
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def _fadvise(fileobj, advice) -> None:
+    try:
+        os.posix_fadvise(fileobj.fileno(), 0, 0, advice)
+    except OSError:
+        pass
+
+
+def _fast_copy(src: str, dst: str, bufsize: int = 4 * 1024 * 1024) -> None:
+    """
+    Cross-device copy with a 4 MiB buffer — video files are large and
+    sequential, where shutil's default chunk size leaves throughput on
+    the table. Copies permissions/mtimes like shutil.move would.
+
+    On POSIX, tells the kernel the read is sequential up front and that
+    neither side will be re-read afterwards (DONTNEED), so a multi-GB
+    copy doesn't evict the rest of the page cache.
+    """
+    with open(src, "rb") as fi, open(dst, "wb") as fo:
+        if _HAS_FADVISE:
+            _fadvise(fi, os.POSIX_FADV_SEQUENTIAL)
+        shutil.copyfileobj(fi, fo, length=bufsize)
+        if _HAS_FADVISE:
+            fo.flush()
+            _fadvise(fi, os.POSIX_FADV_DONTNEED)
+            _fadvise(fo, os.POSIX_FADV_DONTNEED)
+    try:
+        shutil.copystat(src, dst)
+    except OSError:
+        pass
+
+
+# Directory names that only ever hold junk in released torrents; their
+# contents can't contain wanted videos, so the traversal skips the whole
+# subtree (the trash thread removes it with the rest of the temp dir).
+_SKIP_DIRS = frozenset({"sample", "__macosx", ".pad", "subs"})
+
+
+def _iter_files(root: str):
+    """
+    Yield (name, path) for every regular file under `root`, recursively,
+    pruning known-junk directories (Sample/, Subs/, __MACOSX/, .pad/).
+
+    scandir exposes the file type straight from the directory entry, so
+    unlike os.walk + per-file checks this does not stat each file — for
+    torrents with thousands of small files that halves the syscalls in
+    the processing stage.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name.lower() in _SKIP_DIRS:
+                    continue
+                yield from _iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.name, entry.path
+
+
 class TorrentJob:
     """
     Represents a single torrent download job.
@@ -44,6 +117,9 @@ class TorrentJob:
         self.dest_dir = dest_dir
         self.temp_dir = temp_dir
         self.video_exts = {e.lower().lstrip(".") for e in video_exts if e.strip()}
+        # Dotted form for str.endswith, which takes a tuple and runs in
+        # C — the per-file splitext/lstrip allocations go away.
+        self._video_ext_tuple = tuple("." + e for e in self.video_exts)
         self._manager = manager
 
         self.name: Optional[str] = None
@@ -56,39 +132,75 @@ class TorrentJob:
         self.elapsed_seconds: float = 0.0
         self.eta_seconds: Optional[float] = None
 
-        self.created_at: datetime = datetime.utcnow()
-        self.started_at: Optional[datetime] = None
-        self.completed_at: Optional[datetime] = None
+        # Plain epoch nanoseconds: the deprecated datetime.utcnow()
+        # objects were only ever rendered as ISO UTC, so store the cheap
+        # integer and keep the pre-formatted string alongside it.
+        self.created_at_ns: int = time.time_ns()
+        self.started_at_ns: Optional[int] = None
+        self.completed_at_ns: Optional[int] = None
+
+        # ISO strings are formatted when the timestamps are assigned
+        # (once each per job) instead of on every to_dict rebuild.
+        self._created_iso: str = _iso_utc(self.created_at_ns)
+        self._started_iso: Optional[str] = None
+        self._completed_iso: Optional[str] = None
 
         self._cancel_requested: bool = False
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._future = None  # set by TorrentManager.add_job
+
+        # Set by the manager's alert pump; the job thread sleeps on the
+        # event instead of owning a session of its own.
+        self._alert_event = threading.Event()
+        self._finished_alert = False
+        self._files_pruned = False
+        self._seeding = False
+        self._start_ts = 0.0
+
+        # to_dict() cache. The UI polls every second; between status
+        # refreshes nothing changes, so serialization is reused until a
+        # writer flips the dirty flag.
+        self._dict_cache: Optional[Dict] = None
+        self._dict_dirty = True
+        self._json_cache: Optional[bytes] = None
 
     # ------------ public API ------------
 
-    def start(self) -> None:
-        self._thread.start()
-
     def cancel(self) -> None:
         self._cancel_requested = True
+        self._alert_event.set()
 
     def join(self, timeout: Optional[float] = None) -> None:
-        self._thread.join(timeout=timeout)
+        fut = self._future
+        if fut is None:
+            return
+        try:
+            fut.result(timeout=timeout)
+        except Exception:
+            # Timeouts and job errors are reflected in job.status; join
+            # is only a best-effort wait.
+            pass
 
     def force_cleanup(self) -> None:
         """
         Best-effort cleanup of temp directory. Used when deleting a job from UI.
         """
-        try:
-            if os.path.isdir(self.temp_dir):
-                shutil.rmtree(self.temp_dir, ignore_errors=True)
-        except Exception:
-            pass
+        self._cleanup_temp()
+
+    def _mark_dirty(self) -> None:
+        self._dict_dirty = True
+        self._json_cache = None
 
     def to_dict(self) -> Dict:
         """
-        Serialize minimal status for JSON polling.
+        Serialize minimal status for JSON polling. Cached between state
+        changes; a stale read during a concurrent update only means the
+        poller sees the fresh values one tick later.
         """
-        return {
+        cached = self._dict_cache
+        if cached is not None and not self._dict_dirty:
+            return cached
+        self._dict_dirty = False
+        self._dict_cache = {
             "id": self.id,
             "magnet": self.magnet_uri,
             "name": self.name or "",
@@ -99,10 +211,24 @@ class TorrentJob:
             "upload_rate": self.upload_rate,
             "elapsed_seconds": int(self.elapsed_seconds),
             "eta_seconds": int(self.eta_seconds) if self.eta_seconds is not None else None,
-            "created_at": self.created_at.isoformat() + "Z",
-            "started_at": self.started_at.isoformat() + "Z" if self.started_at else None,
-            "completed_at": self.completed_at.isoformat() + "Z" if self.completed_at else None,
+            "created_at": self._created_iso,
+            "started_at": self._started_iso,
+            "completed_at": self._completed_iso,
         }
+        return self._dict_cache
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Compact JSON encoding of to_dict(), cached between state changes
+        so the per-second poll reuses the same bytes.
+        """
+        cached = self._json_cache
+        if cached is not None:
+            return cached
+        self._json_cache = json.dumps(
+            self.to_dict(), separators=(",", ":")
+        ).encode()
+        return self._json_cache
 
     # ------------ internal helpers ------------
 
@@ -121,6 +247,7 @@ class TorrentJob:
         if not LIBTORRENT_AVAILABLE:
             self.status = "error"
             self.error = "python-libtorrent is not installed."
+            self._mark_dirty()
             self._notify_manager_finished()
             return
 
@@ -131,81 +258,158 @@ class TorrentJob:
         except Exception as exc:  # pragma: no cover - defensive
             self.status = "error"
             self.error = f"Unexpected error: {exc!r}"
-            try:
-                shutil.rmtree(self.temp_dir, ignore_errors=True)
-            except Exception:
-                pass
+            self._mark_dirty()
+            self._cleanup_temp()
         finally:
             # Always notify the manager that this job is in a terminal state
             if self.status in ("completed", "error", "cancelled"):
                 self._notify_manager_finished()
 
+    def _on_alert(self, alert) -> None:
+        """
+        Called from the manager's alert pump for alerts that belong to
+        this job's torrent. Just records and wakes the job thread —
+        anything heavier would stall dispatch for every other job.
+        """
+        if isinstance(alert, lt.torrent_finished_alert):
+            self._finished_alert = True
+        self._alert_event.set()
+
+    def _apply_status(self, st) -> None:
+        """
+        Update the state mirror from a torrent_status delivered in the
+        manager's batched state_update_alert — the job never crosses the
+        C++ boundary itself any more.
+        """
+        self.progress = float(st.progress)
+        self.download_rate = int(st.download_rate)
+        self.upload_rate = int(st.upload_rate)
+        self.elapsed_seconds = time.time() - self._start_ts
+
+        remaining_bytes = max(0, st.total_wanted - st.total_wanted_done)
+        if self.download_rate > 0 and remaining_bytes > 0:
+            self.eta_seconds = remaining_bytes / float(self.download_rate)
+        else:
+            self.eta_seconds = None
+
+        if st.is_seeding or st.state == lt.torrent_status.seeding:
+            self._seeding = True
+        self._mark_dirty()
+        self._alert_event.set()
+
     def _run_libtorrent(self) -> None:
         assert lt is not None  # for type checkers
 
         self.status = "downloading"
-        self.started_at = datetime.utcnow()
-        start_ts = time.time()
+        self.started_at_ns = time.time_ns()
+        self._started_iso = _iso_utc(self.started_at_ns)
+        self._mark_dirty()
+        self._start_ts = time.time()
 
-        ses = lt.session()
-        ses.listen_on(6881, 6891)
+        # One session for the whole process, owned by the manager; jobs
+        # only add/remove their torrent on it.
+        ses = self._manager._get_session()  # type: ignore[union-attr]
 
         params = lt.parse_magnet_uri(self.magnet_uri)
         params.save_path = self.temp_dir
 
         handle = ses.add_torrent(params)
+        info_hash = str(handle.info_hash())
+        self._manager._register_handle(info_hash, self)  # type: ignore[union-attr]
 
-        # Main download loop
-        while not self._cancel_requested:
-            s = handle.status()
-
-            # Set name when metadata is available
-            if not self.name:
-                try:
-                    ti = handle.get_torrent_info()
-                    self.name = ti.name()
-                except Exception:
-                    pass
-
-            self.progress = float(s.progress)
-            self.download_rate = int(s.download_rate)
-            self.upload_rate = int(s.upload_rate)
-            self.elapsed_seconds = time.time() - start_ts
+        # Main download loop. All status numbers arrive through the
+        # manager's batched state_update_alert dispatch (_apply_status);
+        # this thread only watches for metadata and the finish
+        # condition, waking on alerts or a coarse 2s tick.
+        try:
+            while not self._cancel_requested:
+                self._alert_event.wait(timeout=2.0)
+                self._alert_event.clear()
 
-            remaining_bytes = max(0, s.total_wanted - s.total_wanted_done)
-            if self.download_rate > 0 and remaining_bytes > 0:
-                self.eta_seconds = remaining_bytes / float(self.download_rate)
-            else:
-                self.eta_seconds = None
+                # Set name when metadata is available
+                if not self.name:
+                    try:
+                        ti = handle.get_torrent_info()
+                        self.name = ti.name()
+                    except Exception:
+                        pass
 
-            # seeding or finished
-            if s.is_seeding or s.state == lt.torrent_status.seeding:
-                break
+                # Once metadata is in, zero out priorities for files we
+                # would delete in _process_files anyway — the bandwidth
+                # and disk writes for nfo/sample/subtitle payloads are
+                # never spent at all.
+                if self.name and not self._files_pruned:
+                    self._files_pruned = True
+                    try:
+                        fs = handle.get_torrent_info().files()
+                        handle.prioritize_files(
+                            [
+                                4
+                                if fs.file_path(i)
+                                .lower()
+                                .endswith(self._video_ext_tuple)
+                                else 0
+                                for i in range(fs.num_files())
+                            ]
+                        )
+                    except Exception:
+                        pass
 
-            time.sleep(0.5)
+                # Keep the wall clock moving even while the swarm is
+                # quiet and no status update gets posted.
+                self.elapsed_seconds = time.time() - self._start_ts
+                self._mark_dirty()
 
-        # Stop any further seeding
-        try:
-            ses.remove_torrent(handle)
-        except Exception:
-            pass
-        try:
-            ses.pause()
-        except Exception:
-            pass
+                # seeding or finished
+                if self._finished_alert or self._seeding:
+                    break
+        finally:
+            self._manager._unregister_handle(info_hash)  # type: ignore[union-attr]
+            # Stop any further seeding. The session itself stays up for
+            # the other jobs — never pause it here.
+            try:
+                ses.remove_torrent(handle)
+            except Exception:
+                pass
 
         if self._cancel_requested:
             self.status = "cancelled"
+            self._mark_dirty()
             self._cleanup_temp()
             return
 
-        # Post-process files
+        # Post-process on the I/O pool; this download worker is freed
+        # for the next queued magnet immediately.
         self.status = "processing"
-        self._process_files()
+        self._mark_dirty()
+        if self._manager is not None:
+            self._manager._io_executor.submit(self._finish_processing)  # type: ignore[union-attr]
+        else:
+            self._finish_processing()
+
+    def _finish_processing(self) -> None:
+        """
+        Runs on the manager's I/O pool after the download ends: moves the
+        videos out, then drives the job to its terminal state and
+        notifies the manager (the download thread exited at
+        status='processing', which _run does not treat as terminal).
+        """
+        try:
+            self._process_files()
+        except Exception as exc:
+            self.status = "error"
+            self.error = f"Post-processing failed: {exc!r}"
+            self._mark_dirty()
+            self._cleanup_temp()
+            self._notify_manager_finished()
+            return
 
         self.status = "completed"
         self.progress = 1.0
-        self.completed_at = datetime.utcnow()
+        self.completed_at_ns = time.time_ns()
+        self._completed_iso = _iso_utc(self.completed_at_ns)
+        self._mark_dirty()
+        self._notify_manager_finished()
 
     def _process_files(self) -> None:
         """
@@ -213,35 +417,62 @@ class TorrentJob:
         """
         os.makedirs(self.dest_dir, exist_ok=True)
 
-        for root, dirs, files in os.walk(self.temp_dir):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                ext = os.path.splitext(fname)[1].lower().lstrip(".")
-
-                if ext in self.video_exts:
-                    dest_name = fname
+        for fname, fpath in _iter_files(self.temp_dir):
+            if fname.lower().endswith(self._video_ext_tuple):
+                # Reserve a free destination name atomically with
+                # O_CREAT|O_EXCL: one open per candidate instead of a
+                # stat per candidate, and no exists/move race with
+                # concurrent jobs writing the same dest_dir.
+                base, ext_full = os.path.splitext(fname)
+                dest_name = fname
+                counter = 1
+                while True:
                     dest_path = os.path.join(self.dest_dir, dest_name)
-
-                    # Avoid overwrite: add suffix if needed
-                    base, ext_full = os.path.splitext(dest_name)
-                    counter = 1
-                    while os.path.exists(dest_path):
+                    try:
+                        os.close(
+                            os.open(
+                                dest_path,
+                                os.O_CREAT | os.O_EXCL | os.O_WRONLY,
+                                0o644,
+                            )
+                        )
+                        break
+                    except FileExistsError:
                         dest_name = f"{base}_{counter}{ext_full}"
-                        dest_path = os.path.join(self.dest_dir, dest_name)
                         counter += 1
 
-                    shutil.move(fpath, dest_path)
-                else:
-                    try:
-                        os.remove(fpath)
-                    except Exception:
-                        pass
+                # Same-filesystem rename is a metadata-only operation;
+                # only fall back to a buffered byte copy when temp and
+                # dest really live on different devices. os.replace
+                # overwrites the empty placeholder reserved above.
+                try:
+                    os.replace(fpath, dest_path)
+                except OSError as exc:
+                    if exc.errno == errno.EXDEV:
+                        _fast_copy(fpath, dest_path)
+                        os.unlink(fpath)
+                    else:
+                        raise
+            else:
+                try:
+                    os.remove(fpath)
+                except Exception:
+                    pass
 
         self._cleanup_temp()
 
     def _cleanup_temp(self) -> None:
+        """
+        Hand the temp dir to the manager's trash thread; the rename is
+        instant, so the job reaches its terminal state without waiting
+        on a recursive delete.
+        """
         try:
-            if os.path.isdir(self.temp_dir):
+            if not os.path.isdir(self.temp_dir):
+                return
+            if self._manager is not None:
+                self._manager.discard_dir(self.temp_dir)  # type: ignore[union-attr]
+            else:
                 shutil.rmtree(self.temp_dir, ignore_errors=True)
         except Exception:
             pass
@@ -254,12 +485,167 @@ class TorrentManager:
     Not persistent across process restarts. Intended for a single Flask instance.
     """
 
-    def __init__(self, temp_root: str) -> None:
+    def __init__(self, temp_root: str, max_concurrent: int = 4) -> None:
         self.temp_root = temp_root
         os.makedirs(self.temp_root, exist_ok=True)
         self._jobs: Dict[str, TorrentJob] = {}
         self._lock = threading.Lock()
 
+        # Bounded worker pool: a user queueing dozens of magnets gets
+        # them processed max_concurrent at a time instead of one OS
+        # thread (and DHT/socket load) per magnet up front.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="torrent-job"
+        )
+
+        # Small pool for post-download file shuffling, so a long move
+        # on one finished torrent doesn't hold its download worker (and
+        # several finished 10+GB jobs can process in parallel).
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="torrent-io"
+        )
+
+        # Copy-on-write read snapshots, republished after every mutation
+        # of _jobs; list_jobs/get_job read them without the lock.
+        self._snapshot: tuple = ()
+        self._snapshot_by_id: Dict[str, TorrentJob] = {}
+
+        # One libtorrent session shared by all jobs (one network stack,
+        # one DHT bootstrap, one listen port), created lazily on the
+        # first job together with the single alert-pump thread that
+        # dispatches alerts to jobs by info hash.
+        self._ses = None
+        self._by_hash: Dict[str, TorrentJob] = {}
+        self._alert_thread: Optional[threading.Thread] = None
+        self._status_flags = None
+
+        # Monotonic time of the last /torrents poll; the alert pump
+        # stops requesting status batches (and waits longer) once no
+        # client has asked in a while. Downloads proceed regardless —
+        # only the Python state mirror goes quiet.
+        self.last_poll_monotonic = 0.0
+
+        # Deferred deletion: finished jobs rename their temp dir into
+        # .trash (metadata-only) and a single background thread does the
+        # recursive delete, so completion isn't blocked on unlinking
+        # thousands of files. Leftovers from a crash are re-queued.
+        self._trash_dir = os.path.join(self.temp_root, ".trash")
+        os.makedirs(self._trash_dir, exist_ok=True)
+        self._trash_queue: "queue.Queue[str]" = queue.Queue()
+        self._trash_thread = threading.Thread(
+            target=self._drain_trash, daemon=True, name="torrent-trash"
+        )
+        self._trash_thread.start()
+        for stale in os.listdir(self._trash_dir):
+            self._trash_queue.put(os.path.join(self._trash_dir, stale))
+
+    def discard_dir(self, path: str) -> None:
+        """
+        Queue a directory for background deletion. Falls back to inline
+        rmtree if it cannot be renamed into the trash dir.
+        """
+        trash_path = os.path.join(self._trash_dir, uuid.uuid4().hex)
+        try:
+            os.rename(path, trash_path)
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        self._trash_queue.put(trash_path)
+
+    def _drain_trash(self) -> None:
+        while True:
+            path = self._trash_queue.get()
+            shutil.rmtree(path, ignore_errors=True)
+
+    # ------------ shared session / alert pump ------------
+
+    def _get_session(self):
+        assert lt is not None
+        with self._lock:
+            if self._ses is None:
+                self._ses = lt.session(
+                    {
+                        "listen_interfaces": "0.0.0.0:6881",
+                        "alert_mask": lt.alert.category_t.status_notification
+                        | lt.alert.category_t.error_notification,
+                    }
+                )
+                try:
+                    self._ses.start_dht()
+                    self._ses.start_lsd()
+                except Exception:
+                    pass
+                # Ask only for accurate counters when polling statuses;
+                # the default copies name/save_path and more per torrent.
+                try:
+                    self._status_flags = (
+                        lt.torrent_handle.query_accurate_download_counters
+                    )
+                except AttributeError:  # older libtorrent builds
+                    self._status_flags = None
+                self._alert_thread = threading.Thread(
+                    target=self._pump_alerts, daemon=True, name="torrent-alerts"
+                )
+                self._alert_thread.start()
+            return self._ses
+
+    def _register_handle(self, info_hash: str, job: TorrentJob) -> None:
+        with self._lock:
+            self._by_hash[info_hash] = job
+
+    def _unregister_handle(self, info_hash: str) -> None:
+        with self._lock:
+            self._by_hash.pop(info_hash, None)
+
+    def _pump_alerts(self) -> None:
+        """
+        Single consumer of the shared session's alert queue. Routes each
+        alert to the owning job; jobs do their own status reads on their
+        own threads, so this loop stays cheap no matter how many jobs run.
+        """
+        ses = self._ses
+        while True:
+            try:
+                # With no recent poller there is nobody to show fresh
+                # numbers to: wait longer and skip the status batches.
+                watched = time.monotonic() - self.last_poll_monotonic < 30.0
+                ses.wait_for_alert(1000 if watched else 5000)
+                for alert in ses.pop_alerts():
+                    # One state_update_alert carries the statuses of all
+                    # torrents that changed — a single boundary crossing
+                    # instead of one handle.status() per job.
+                    if isinstance(alert, lt.state_update_alert):
+                        for st in alert.status:
+                            try:
+                                key = str(st.handle.info_hash())
+                            except Exception:
+                                continue
+                            job = self._by_hash.get(key)
+                            if job is not None:
+                                job._apply_status(st)
+                        continue
+
+                    handle = getattr(alert, "handle", None)
+                    if handle is None:
+                        continue
+                    try:
+                        key = str(handle.info_hash())
+                    except Exception:
+                        continue
+                    job = self._by_hash.get(key)
+                    if job is not None:
+                        job._on_alert(alert)
+
+                # Request the next status batch for every torrent at once.
+                if watched and self._by_hash:
+                    if self._status_flags is not None:
+                        ses.post_torrent_updates(self._status_flags)
+                    else:
+                        ses.post_torrent_updates()
+            except Exception:
+                # Never let a bad alert kill the pump for everyone.
+                time.sleep(1.0)
+
     def add_job(self, magnet_uri: str, dest_dir: str, video_exts: List[str]) -> TorrentJob:
         job_temp_dir = os.path.join(self.temp_root, uuid.uuid4().hex)
         job = TorrentJob(
@@ -272,19 +658,40 @@ class TorrentManager:
 
         with self._lock:
             self._jobs[job.id] = job
+            self._publish_snapshot()
 
-        job.start()
+        job._future = self._executor.submit(job._run)
         return job
 
+    def _publish_snapshot(self) -> None:
+        """
+        Rebuild the immutable read snapshot. Call with self._lock held;
+        readers pick up the new tuple/dict on their next attribute read
+        without ever taking the lock.
+        """
+        self._snapshot = tuple(self._jobs.values())
+        self._snapshot_by_id = dict(self._jobs)
+
     def list_jobs(self) -> List[Dict]:
-        with self._lock:
-            # Only return jobs that are still known; finished jobs will be
-            # auto-removed via _job_finished
-            return [job.to_dict() for job in self._jobs.values()]
+        # Lock-free: iterate the published snapshot, so 1Hz UI polling
+        # never contends with add/remove or the alert pump. Finished
+        # jobs are auto-removed via _job_finished.
+        self.last_poll_monotonic = time.monotonic()
+        return [job.to_dict() for job in self._snapshot]
+
+    def list_jobs_json(self) -> bytes:
+        """
+        The /torrents/status payload as ready-to-send bytes: each job's
+        JSON is cached on the job, so steady-state polling only joins
+        the cached fragments instead of re-serializing every field.
+        """
+        self.last_poll_monotonic = time.monotonic()
+        return b'{"jobs":[' + b",".join(
+            job.to_json_bytes() for job in self._snapshot
+        ) + b"]}"
 
     def get_job(self, job_id: str) -> Optional[TorrentJob]:
-        with self._lock:
-            return self._jobs.get(job_id)
+        return self._snapshot_by_id.get(job_id)
 
     def delete_job(self, job_id: str) -> bool:
         """
@@ -292,6 +699,8 @@ class TorrentManager:
         """
         with self._lock:
             job = self._jobs.pop(job_id, None)
+            if job is not None:
+                self._publish_snapshot()
 
         if not job:
             return False
@@ -307,3 +716,4 @@ class TorrentManager:
             # Only remove if still present (it might have been manually deleted).
             if job.id in self._jobs:
                 self._jobs.pop(job.id, None)
+                self._publish_snapshot()